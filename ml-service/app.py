@@ -4,4 +4,5 @@ import os
 app = create_app()
 
 if __name__ == '__main__':
+    # Werkzeug development server; containers run `gunicorn -c gunicorn.conf.py app:app`
     app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5001)))
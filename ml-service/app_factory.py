@@ -1,14 +1,50 @@
 import os
+import time
 import logging
 from flask import Flask, g, request
 from flask_cors import CORS
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+
+def init_tracer_provider():
+    """
+    Install a sampled OTLP/HTTP tracer provider for this process.
+    The exporter reads OTEL_EXPORTER_OTLP_ENDPOINT and posts to <endpoint>/v1/traces.
+    """
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.sdk.resources import Resource as OTelResource
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    resource = OTelResource.create({"service.name": "ml-service", "service.version": "1.0.0"})
+    # Head sampling: unsampled requests get no-op spans (honours an upstream caller's decision)
+    sample_ratio = float(os.getenv('OTEL_SAMPLE_RATIO', '0.01'))
+    provider = TracerProvider(resource=resource, sampler=ParentBased(TraceIdRatioBased(sample_ratio)))
+    provider.add_span_processor(BatchSpanProcessor(
+        OTLPSpanExporter(), max_queue_size=4096, max_export_batch_size=512, schedule_delay_millis=2000
+    ))
+    trace.set_tracer_provider(provider)
+    logger.info(f"OpenTelemetry tracing enabled → {os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')} "
+                f"(sample ratio {sample_ratio})")
+
+
 def create_app():
+    # Level from LOG_LEVEL (default WARNING); the format skips logger-name/level lookups per record
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'WARNING').upper(),
+        format='%(asctime)s [%(levelname).3s] ml %(message)s',
+    )
+
     app = Flask(__name__)
     
+    # Use orjson for request.get_json() / jsonify() when installed
+    from utils.json_provider import OrjsonProvider, ORJSON_AVAILABLE
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    
     # Configure CORS
     frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:5173')
     CORS(app, resources={r"/api/*": {"origins": frontend_url}})
@@ -17,17 +53,16 @@ def create_app():
     from utils.limiter import limiter
     limiter.init_app(app)
     
-    # Setup request logger middlewares
+    # Setup request logger middlewares: one line per request, formatted only when INFO is enabled
     @app.before_request
     def log_request():
-        g.start_time = datetime.now()
-        logger.info(f"Request: {request.method} {request.path}")
+        g.start_ns = time.perf_counter_ns()
 
     @app.after_request
     def log_response(response):
-        if hasattr(g, 'start_time'):
-            duration = (datetime.now() - g.start_time).total_seconds() * 1000
-            logger.info(f"Response: {request.method} {request.path} {response.status_code} {duration:.2f}ms")
+        if hasattr(g, 'start_ns') and logger.isEnabledFor(logging.INFO):
+            duration = (time.perf_counter_ns() - g.start_ns) / 1e6
+            logger.info(f"{request.method} {request.path} {response.status_code} {duration:.2f}ms")
         return response
 
     # Register blueprints
@@ -46,25 +81,16 @@ def create_app():
     app.register_blueprint(simulation_bp)
     app.register_blueprint(health_bp)
 
-    # OpenTelemetry trace provider configuration and instrumentation
-    try:
-        from opentelemetry import trace
-        from opentelemetry.sdk.trace import TracerProvider
-        from opentelemetry.sdk.trace.export import BatchSpanProcessor
-        from opentelemetry.sdk.resources import Resource as OTelResource
-        
-        otel_endpoint = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')
-        if otel_endpoint:
-            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-            resource = OTelResource.create({"service.name": "ml-service", "service.version": "1.0.0"})
-            provider = TracerProvider(resource=resource)
-            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otel_endpoint)))
-            trace.set_tracer_provider(provider)
-            
+    # OpenTelemetry Flask instrumentation; spans go to the provider installed by init_tracer_provider()
+    otel_endpoint = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')
+    if otel_endpoint:
+        try:
             from opentelemetry.instrumentation.flask import FlaskInstrumentor
             FlaskInstrumentor().instrument_app(app)
-            logger.info(f"OpenTelemetry Flask tracing enabled → {otel_endpoint}")
-    except Exception as e:
-        logger.info(f"OpenTelemetry setup skipped: {e}")
+            # Under gunicorn the provider is started per worker in post_fork instead
+            if os.getenv('OTEL_INIT_PER_WORKER') != '1':
+                init_tracer_provider()
+        except Exception as e:
+            logger.info(f"OpenTelemetry setup skipped: {e}")
 
     return app
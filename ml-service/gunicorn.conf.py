@@ -0,0 +1,73 @@
+"""
+Gunicorn configuration for the ML service.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# CPU-bound predictions: one process per core, sklearn releases the GIL inside
+# its C code so a couple of threads per worker still overlap request I/O.
+# Override WEB_CONCURRENCY in containers whose CPU quota is below the host core count.
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 2))
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+backlog = 4096
+
+# Recycle workers to cap slow memory growth; with preload_app a replacement is just a fork
+# of the master, and the jitter keeps workers from restarting at the same moment
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = 500
+
+# One worker per core already saturates the CPUs; keep OpenMP/BLAS pools (XGBoost, NumPy)
+# from spawning a thread per core inside every worker. Set before the app imports them
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+# Load the app (and the fitted model) once in the master so workers share it copy-on-write
+preload_app = True
+
+# The OTLP exporter's session and export thread must not be shared across fork(),
+# so create_app() leaves the tracer provider to post_fork
+os.environ['OTEL_INIT_PER_WORKER'] = '1'
+
+# Likewise the native-compile and ONNX-export threads: the preloaded master must not run gcc
+# or start threads that die at fork(), so each worker schedules them in post_fork
+os.environ['VERSION_SCORERS_PER_WORKER'] = '1'
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before workers fork,
+    # so the compare model pool and compiled kernels are shared copy-on-write
+    from services.model_manager import model_manager
+    model_manager.warm_up()
+
+
+def post_fork(server, worker):
+    # Forked workers inherit the master's global RNG state; give each its own stream
+    import numpy as np
+    np.random.seed()
+
+    # Threads do not survive fork(): restart the model hot-reload watcher in each worker
+    from services.model_manager import model_manager
+    model_manager.start_watcher()
+    model_manager.start_version_scorers()
+    if os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT'):
+        from app_factory import init_tracer_provider
+        try:
+            init_tracer_provider()
+        except Exception as e:
+            server.log.info(f"OpenTelemetry setup skipped: {e}")
+
+
+def child_exit(server, worker):
+    # Drop a dead worker's live gauges from the prometheus_client multiprocess directory
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -4,12 +4,31 @@ Supports Random Forest and XGBoost with synthetic training data
 """
 
 import os
+import glob
+import threading
+import uuid
 import numpy as np
 import joblib
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, IsolationForest
+from functools import lru_cache
+
+# Optional Intel Extension for Scikit-learn: oneDAL-backed RandomForestRegressor.
+# Must patch before RandomForestRegressor is imported below; opt-in with USE_SKLEARNEX=1.
+SKLEARNEX_ENABLED = False
+if os.getenv('USE_SKLEARNEX', '0') == '1':
+    try:
+        from sklearnex import patch_sklearn
+        patch_sklearn(['sklearn.ensemble.RandomForestRegressor'])
+        SKLEARNEX_ENABLED = True
+    except ImportError:
+        print("⚠️ USE_SKLEARNEX=1 but scikit-learn-intelex is not installed")
+
+from sklearn.ensemble import (RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor,
+                              IsolationForest)
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import cross_validate, train_test_split
 from datetime import datetime
+from utils.jit import njit, NUMBA_AVAILABLE
 
 # Try to import XGBoost (optional)
 try:
@@ -19,6 +38,189 @@ except ImportError:
     XGBOOST_AVAILABLE = False
     print("⚠️ XGBoost not available, using GradientBoosting as fallback")
 
+# Try to import Treelite (optional) - native tree traversal for single-row predictions
+try:
+    import treelite
+    TREELITE_AVAILABLE = True
+except ImportError:
+    TREELITE_AVAILABLE = False
+
+# Try to import TL2cgen (optional) - compiles the Treelite model into a shared library
+try:
+    import tl2cgen
+    TL2CGEN_AVAILABLE = True
+except ImportError:
+    TL2CGEN_AVAILABLE = False
+
+# Try to import ONNX Runtime + skl2onnx (optional) - vectorized TreeEnsemble kernels
+try:
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Compiling the default 200-tree forest takes minutes, so it runs in the background and is opt-in
+NATIVE_COMPILE = os.getenv('NATIVE_COMPILE', '0') == '1'
+
+# 'onnx' serves single and batch predictions of sklearn models through ONNX Runtime
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'treelite')
+
+# gunicorn.conf.py sets VERSION_SCORERS_PER_WORKER=1: with preload_app the model is loaded in the
+# master, whose compile/export threads would not survive fork(), so the per-version scorers wait
+# for post_fork to call start_version_scorers() in each worker
+_defer_version_scorers = os.getenv('VERSION_SCORERS_PER_WORKER') == '1'
+
+# Upper bound on LRU-cached single predictions (3 sizes x 3 types x 5 priorities x 101 load bins = 4545 keys
+# per startupOverhead value; the default overhead is served by the lookup table once built)
+PREDICT_CACHE_SIZE = int(os.getenv('PREDICT_CACHE_SIZE', 8192))
+
+# Per-thread (1, n_features) input buffers reused by predict() instead of allocating a new row per call.
+# float32 like predict_many: the scaler preserves it and the tree scorers consume it without a copy
+_tls = threading.local()
+
+
+def _row_buffer(n_feats):
+    row = getattr(_tls, 'row', None)
+    if row is None or row.shape[1] != n_feats:
+        row = np.empty((1, n_feats), dtype=np.float32)
+        _tls.row = row
+    return row
+
+
+@njit(cache=True)
+def _guard_predictions(predictions, task_size, resource_load, startup_overhead, quantile):
+    """
+    Batch version of predict()'s post-processing: feasibility floor, conformal
+    interval and rule-based confidence. Under Numba the element-wise expressions
+    are fused into single loops; without it this runs as plain NumPy.
+    Returns:
+        (predicted_times, confidences, lower_bounds, upper_bounds) arrays
+    """
+    min_feasible_time = np.maximum(0.2, startup_overhead * 0.8)
+    times = np.maximum(predictions, min_feasible_time)
+    lower_bounds = np.maximum(min_feasible_time, times - quantile)
+    upper_bounds = times + quantile
+
+    confidences = (0.92
+                   - np.where((resource_load > 92) | (resource_load < 5), 0.15, 0.0)
+                   - np.where((task_size == 3) & (resource_load > 85), 0.10, 0.0))
+    confidences = np.minimum(1.0, np.maximum(0.1, confidences))
+    return times, confidences, lower_bounds, upper_bounds
+
+
+@njit(cache=True)
+def _execution_times(task_size, task_type, priority, resource_load, startup_overhead, noise, latency_spikes):
+    """Synthetic execution time per task, computed in one fused loop instead of a chain of temporaries."""
+    n = len(task_size)
+    execution_time = np.empty(n)
+    for i in range(n):
+        if task_type[i] == 1:
+            type_modifier = 1.0
+        elif task_type[i] == 2:
+            type_modifier = 1.3
+        else:
+            type_modifier = 1.15
+        load_modifier = 1 + (resource_load[i] / 100) * 0.5
+        priority_factor = 1 - (priority[i] - 3) * 0.02
+        # Startup overhead directly adds to time; latency spikes model unreliable hosts
+        t = (task_size[i] * 2 * type_modifier * load_modifier * priority_factor
+             + startup_overhead[i] + noise[i] + latency_spikes[i])
+        execution_time[i] = max(t, 0.5)
+    return execution_time
+
+
+@njit(cache=True)
+def _forest_score_row(x, roots, children_left, children_right, feature, threshold, value, offset, scale):
+    """Walk every tree of a packed forest (see _pack_forest) for one row: offset + scale * sum of leaves."""
+    total = 0.0
+    for root in roots:
+        node = root
+        while children_left[node] >= 0:
+            if x[feature[node]] <= threshold[node]:
+                node = children_left[node]
+            else:
+                node = children_right[node]
+        total += value[node]
+    return offset + scale * total
+
+
+def _pack_forest(model):
+    """
+    Concatenate the node arrays of a fitted sklearn RandomForestRegressor or
+    GradientBoostingRegressor into flat arrays for _forest_score_row.
+    Returns None for other model types.
+    """
+    if isinstance(model, RandomForestRegressor):
+        trees = [est.tree_ for est in model.estimators_]
+        scale = 1.0 / len(trees)
+    elif isinstance(model, GradientBoostingRegressor):
+        trees = [est.tree_ for est in model.estimators_.ravel()]
+        scale = model.learning_rate
+    else:
+        return None
+    
+    sizes = np.array([tree.node_count for tree in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+    shift = np.repeat(roots, sizes)
+    children_left = np.concatenate([tree.children_left for tree in trees]).astype(np.int32)
+    children_right = np.concatenate([tree.children_right for tree in trees]).astype(np.int32)
+    is_split = children_left >= 0
+    children_left[is_split] += shift[is_split]
+    children_right[is_split] += shift[is_split]
+    forest = (
+        roots, children_left, children_right,
+        np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+        np.concatenate([tree.threshold for tree in trees]),
+        np.concatenate([tree.value.reshape(-1) for tree in trees]),
+    )
+    
+    # Boosting adds the init estimator's constant prediction; recover it from one sklearn call
+    offset = 0.0
+    if isinstance(model, GradientBoostingRegressor):
+        x = np.zeros(model.n_features_in_, dtype=np.float32)
+        offset = float(model.predict(x[None, :])[0]) - _forest_score_row(x, *forest, 0.0, scale)
+    return forest + (offset, scale)
+
+
+def check_sklearnex_parity(tolerance=0.01):
+    """
+    Compare the patched (oneDAL) RandomForestRegressor against stock scikit-learn on a
+    fixed golden set. Returns the mean absolute difference relative to the mean target,
+    or None when sklearnex is not enabled.
+    """
+    if not SKLEARNEX_ENABLED:
+        return None
+    from sklearn.ensemble._forest import RandomForestRegressor as StockRandomForestRegressor
+
+    rng = np.random.RandomState(0)
+    X = np.column_stack([
+        rng.randint(1, 4, 1000), rng.randint(1, 4, 1000), rng.randint(1, 6, 1000),
+        rng.uniform(0, 100, 1000), rng.uniform(0.5, 2.0, 1000),
+    ])
+    y = X[:, 0] * 2 + X[:, 1] + X[:, 3] * 0.05 + X[:, 4] + rng.normal(0, 0.3, 1000)
+    params = dict(n_estimators=50, max_depth=15, random_state=42)
+    patched = RandomForestRegressor(**params).fit(X, y).predict(X)
+    stock = StockRandomForestRegressor(**params).fit(X, y).predict(X)
+    rel_diff = float(np.mean(np.abs(patched - stock)) / np.mean(np.abs(y)))
+    if rel_diff > tolerance:
+        print(f"⚠️ sklearnex RandomForest differs from scikit-learn by {rel_diff:.2%} on the golden set")
+    else:
+        print(f"✅ sklearnex RandomForest parity OK ({rel_diff:.2%} mean abs diff)")
+    return rel_diff
+
+
+def start_version_scorers(predictors):
+    """
+    Stop deferring the per-version scorers in this process and schedule them for `predictors`.
+    Called from gunicorn's post_fork hook, once per worker.
+    """
+    global _defer_version_scorers
+    _defer_version_scorers = False
+    for predictor in predictors:
+        predictor._schedule_version_scorers()
+
 
 class TaskPredictor:
     def __init__(self, model_path='models/task_predictor.joblib', model_type='random_forest'):
@@ -27,8 +229,18 @@ class TaskPredictor:
         self.scaler = None
         self.version = None
         self.calibration_quantile = 0.5  # Default fallback residual bound (s)
-        self.model_type = model_type  # 'random_forest', 'xgboost', or 'gradient_boosting'
+        self.model_type = model_type  # 'random_forest', 'xgboost', 'gradient_boosting' or 'hist_gradient_boosting'
         self.last_loaded_time = 0
+        self._packed_forest = None  # flat node arrays of self.model for _forest_score_row, see _build_native_scorer
+        self._native_model = None  # Treelite copy of self.model, see _build_native_scorer
+        self._compiled_model = None  # tl2cgen shared library for self.version, see _schedule_native_compile
+        self._onnx_session = None  # ONNX Runtime session for self.version, see _schedule_onnx_export
+        self._scorer_lock = threading.RLock()
+        self._use_lookup_table = False  # set by build_lookup_table
+        self._training_X = None  # growable buffers holding the retrain() data, see retrain
+        self._training_y = None
+        self._n_training_rows = 0
+        self._reset_prediction_cache()
         self._load_or_create_model()
     
     def _load_or_create_model(self):
@@ -42,6 +254,9 @@ class TaskPredictor:
                 self.calibration_quantile = data.get('calibration_quantile', 0.5)
                 self.model_type = data.get('model_type', 'random_forest')
                 self.last_loaded_time = os.path.getmtime(self.model_path)
+                self._serve_single_threaded()
+                self._on_model_updated()
+                self._schedule_version_scorers()
                 print(f"✅ Loaded {self.model_type} model version: {self.version} (scaler: {self.scaler is not None})")
                 return
             except Exception as e:
@@ -64,6 +279,235 @@ class TaskPredictor:
                 print(f"⚠️ Error checking for model updates: {e}")
         return False
     
+    def _serve_single_threaded(self):
+        """
+        Predict with one thread once fitting is done (n_jobs=-1 is only for training):
+        gunicorn already runs a worker process per core, so a per-call thread pool would
+        oversubscribe the CPUs under concurrent load.
+        """
+        if 'n_jobs' in self.model.get_params():
+            self.model.set_params(n_jobs=1)
+
+    def _on_model_updated(self):
+        """Refresh everything derived from the fitted model after a train or reload"""
+        self._build_native_scorer()
+        self._reset_prediction_cache()
+        self._warm_up_scorers()
+
+    def _warm_up_scorers(self):
+        """
+        Score dummy rows once so the first request after a load or train does not pay for
+        lazy initialization (XGBoost/OpenMP thread setup, Numba kernel loading).
+        """
+        X = np.zeros((2, getattr(self.model, 'n_features_in_', 5)), dtype=np.float32)
+        try:
+            self._score_rows(X)
+            self._score_row(X[:1])
+        except Exception as e:
+            print(f"⚠️ Scorer warm-up failed: {e}")
+
+    def _build_native_scorer(self):
+        """
+        Prepare the single-row scorers that skip sklearn's per-call validation and thread-pool
+        setup: a packed copy of sklearn forests for the Numba tree walker, and a Treelite import
+        of the ensemble for its GTIL engine and the optional compiled library.
+        """
+        packed_forest = None
+        if NUMBA_AVAILABLE and self.model is not None:
+            try:
+                packed_forest = _pack_forest(self.model)
+            except Exception as e:
+                print(f"⚠️ Could not pack {self.model_type} trees for the Numba scorer: {e}")
+        native_model = None
+        if TREELITE_AVAILABLE and self.model is not None:
+            try:
+                if hasattr(self.model, 'get_booster'):
+                    native_model = treelite.frontend.from_xgboost(self.model.get_booster())
+                else:
+                    native_model = treelite.sklearn.import_model(self.model)
+            except Exception as e:
+                print(f"⚠️ Treelite import failed, using {self.model_type} predict: {e}")
+        # Swap all scorers together; the compiled library and ONNX session belong to the previous model
+        with self._scorer_lock:
+            self._packed_forest = packed_forest
+            self._native_model = native_model
+            self._compiled_model = None
+            self._onnx_session = None
+
+    def _schedule_version_scorers(self):
+        """Prepare the optional per-version scorers once self.version is final"""
+        if _defer_version_scorers:
+            return
+        self._schedule_native_compile()
+        self._schedule_onnx_export()
+
+    def _compiled_lib_path(self, version):
+        return f"{os.path.splitext(self.model_path)[0]}_{version}.so"
+
+    def _onnx_path(self, version):
+        return f"{os.path.splitext(self.model_path)[0]}_{version}.onnx"
+
+    def _calibration_path(self, version):
+        return f"{os.path.splitext(self.model_path)[0]}_{version}_calibration.npy"
+
+    def calibration_residuals(self):
+        """
+        Absolute residuals of the current model on the conformal calibration split.
+        Saved once per version to models/<model>_<version>_calibration.npy and memory-mapped
+        from there, so restarted workers skip regenerating and rescoring the calibration set.
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded")
+        path = self._calibration_path(self.version)
+        if os.path.exists(path):
+            try:
+                return np.load(path, mmap_mode='r')
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Failed to load calibration residuals {path}: {e}")
+        
+        X_all, y_all = self._generate_synthetic_data(500)
+        _, X_cal, _, y_cal = train_test_split(X_all, y_all, test_size=0.3, random_state=42)
+        X_cal = X_cal[:, :getattr(self.scaler, 'n_features_in_', getattr(self.model, 'n_features_in_', 5))]
+        # The model was fitted on standardized features
+        if self.scaler is not None:
+            X_cal = self.scaler.transform(X_cal)
+        residuals = np.abs(y_cal - self.model.predict(X_cal))
+        
+        tmp_path = self._tmp_artifact_path(path)
+        try:
+            np.save(tmp_path, residuals)
+            os.replace(tmp_path, path)
+            self._remove_stale_artifacts('_calibration.npy', path)
+        except OSError as e:
+            print(f"⚠️ Could not persist calibration residuals: {e}")
+        return residuals
+
+    @staticmethod
+    def _tmp_artifact_path(path):
+        """
+        Scratch file to write `path` into before os.replace. Unique per process and call, since
+        every gunicorn worker builds the same per-version artifacts at the same time.
+        """
+        base, ext = os.path.splitext(path)
+        return f"{base}.{os.getpid()}.{uuid.uuid4().hex}.tmp{ext}"
+
+    def _remove_stale_artifacts(self, ext, keep):
+        """Drop per-version artifacts built for older versions of this model"""
+        for stale in glob.glob(f"{os.path.splitext(self.model_path)[0]}_v*{ext}"):
+            # Other processes' in-progress .tmp files are not stale
+            if stale != keep and not os.path.splitext(stale)[0].endswith('.tmp'):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def _schedule_onnx_export(self):
+        """
+        With INFERENCE_BACKEND=onnx, serve predictions through an ONNX Runtime session for the
+        current version: load models/<model>_<version>.onnx if present, otherwise convert the
+        sklearn model in a background thread (conversion takes seconds for the default forest).
+        """
+        if INFERENCE_BACKEND != 'onnx' or not ONNX_AVAILABLE or self.model is None:
+            return
+        if hasattr(self.model, 'get_booster'):
+            return  # skl2onnx has no XGBoost converter registered
+        version, model = self.version, self.model
+        onnx_path = self._onnx_path(version)
+        if os.path.exists(onnx_path):
+            self._install_onnx_session(version, onnx_path)
+            return
+        threading.Thread(target=self._export_onnx, args=(model, version, onnx_path), daemon=True).start()
+
+    def _export_onnx(self, model, version, onnx_path):
+        tmp_path = self._tmp_artifact_path(onnx_path)
+        try:
+            onx = convert_sklearn(model, initial_types=[('X', FloatTensorType([None, model.n_features_in_]))])
+            with open(tmp_path, 'wb') as f:
+                f.write(onx.SerializeToString())
+            os.replace(tmp_path, onnx_path)
+        except Exception as e:
+            print(f"⚠️ ONNX export failed, staying on {self.model_type} predict: {e}")
+            return
+        self._remove_stale_artifacts('.onnx', onnx_path)
+        self._install_onnx_session(version, onnx_path)
+
+    def _install_onnx_session(self, version, onnx_path):
+        try:
+            options = ort.SessionOptions()
+            # gunicorn already runs one process per core
+            options.intra_op_num_threads = 1
+            options.inter_op_num_threads = 1
+            session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        except Exception as e:
+            print(f"⚠️ Failed to load ONNX model {onnx_path}: {e}")
+            return
+        with self._scorer_lock:
+            if self.version == version:
+                self._onnx_session = session
+                print(f"⚡ ONNX Runtime scorer active for {version}")
+
+    def _schedule_native_compile(self):
+        """
+        Serve single-row predictions from a tl2cgen-compiled shared library for the current
+        version: load it if it was already built, otherwise compile it in a background thread
+        (GTIL keeps serving meanwhile). Enabled with NATIVE_COMPILE=1.
+        """
+        if not (NATIVE_COMPILE and TL2CGEN_AVAILABLE) or self._native_model is None:
+            return
+        version, native_model = self.version, self._native_model
+        libpath = self._compiled_lib_path(version)
+        if os.path.exists(libpath):
+            self._install_compiled_model(version, libpath)
+            return
+        threading.Thread(target=self._compile_native_lib, args=(native_model, version, libpath), daemon=True).start()
+
+    def _compile_native_lib(self, native_model, version, libpath):
+        tmp_path = self._tmp_artifact_path(libpath)
+        try:
+            tl2cgen.export_lib(native_model, toolchain='gcc', libpath=tmp_path,
+                               params={'parallel_comp': os.cpu_count() or 1})
+            os.replace(tmp_path, libpath)
+        except Exception as e:
+            print(f"⚠️ Native compile failed, staying on Treelite GTIL: {e}")
+            return
+        self._remove_stale_artifacts('.so', libpath)
+        self._install_compiled_model(version, libpath)
+
+    def _install_compiled_model(self, version, libpath):
+        try:
+            compiled = tl2cgen.Predictor(libpath, nthread=1)
+        except Exception as e:
+            print(f"⚠️ Failed to load compiled model {libpath}: {e}")
+            return
+        with self._scorer_lock:
+            # The model may have been retrained while compiling
+            if self.version == version:
+                self._compiled_model = compiled
+                print(f"⚡ Compiled scorer active for {version}")
+
+    def _score_rows(self, X_scaled):
+        """Raw model outputs for a matrix of scaled rows"""
+        session = self._onnx_session
+        if session is not None:
+            return session.run(None, {'X': np.asarray(X_scaled, dtype=np.float32)})[0].reshape(-1)
+        return self.model.predict(X_scaled)
+
+    def _score_row(self, X_scaled):
+        """Raw model output for a single scaled row"""
+        if self._onnx_session is not None:
+            return float(self._score_rows(X_scaled)[0])
+        compiled = self._compiled_model
+        if compiled is not None:
+            X32 = np.asarray(X_scaled, dtype=np.float32)
+            return float(compiled.predict(tl2cgen.DMatrix(X32)).reshape(-1)[0])
+        packed_forest = self._packed_forest
+        if packed_forest is not None:
+            return _forest_score_row(np.asarray(X_scaled[0], dtype=np.float32), *packed_forest)
+        if self._native_model is not None:
+            X32 = np.asarray(X_scaled, dtype=np.float32)
+            return float(treelite.gtil.predict(self._native_model, X32, nthread=1).reshape(-1)[0])
+        return float(self.model.predict(X_scaled)[0])
+    
     def _generate_synthetic_data(self, n_samples=1000):
         """Generate realistic synthetic training data"""
         # Strict seeding for deterministic synthetic data
@@ -76,24 +520,16 @@ class TaskPredictor:
         resource_load = rng.uniform(0, 100, n_samples)
         startup_overhead = rng.uniform(0.5, 5.0, n_samples) # 0.5s to 5s overhead
         
-        X = np.column_stack([task_size, task_type, priority, resource_load, startup_overhead])
-        
-        # Generate realistic execution times
-        base_time = task_size * 2
-        type_modifier = np.where(task_type == 1, 1.0,
-                        np.where(task_type == 2, 1.3, 1.15))
-        load_modifier = 1 + (resource_load / 100) * 0.5
-        priority_factor = 1 - (priority - 3) * 0.02
+        # float32 like every serving path, so training and prediction see identical feature values
+        X = np.column_stack([task_size, task_type, priority, resource_load, startup_overhead]).astype(np.float32)
         
-        execution_time = (base_time * type_modifier * load_modifier * priority_factor +
-                         startup_overhead + # Startup overhead directly adds to time
-                         rng.normal(0, 0.5, n_samples))
-        
-        # Add "unreliability" factor (latency spikes)
+        # Same draws in the same order as before, so the seeded dataset is unchanged
+        noise = rng.normal(0, 0.5, n_samples)
         latency_spikes = rng.choice([0, 1], n_samples, p=[0.95, 0.05]) * rng.uniform(1, 5, n_samples)
-        execution_time += latency_spikes
         
-        execution_time = np.maximum(execution_time, 0.5)
+        # Generate realistic execution times
+        execution_time = _execution_times(task_size, task_type, priority, resource_load, startup_overhead,
+                                          noise, latency_spikes)
 
         # Target shape is (n_samples,): execution_time
         Y = execution_time
@@ -107,7 +543,8 @@ class TaskPredictor:
     
     def train(self, X, y):
         """Train the model with provided data using StandardScaler and Conformal Calibration"""
-        # 1. Fit StandardScaler
+        # 1. Fit StandardScaler on C-contiguous float32 features (the dtype trees traverse with)
+        X = np.ascontiguousarray(X, dtype=np.float32)
         self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X)
 
@@ -132,6 +569,15 @@ class TaskPredictor:
                 min_samples_leaf=2,
                 random_state=42
             )
+        elif self.model_type == 'hist_gradient_boosting':
+            # Same settings as train.py's default, so its artifacts retrain as the same model
+            self.model = HistGradientBoostingRegressor(
+                max_iter=300,
+                max_depth=8,
+                learning_rate=0.08,
+                early_stopping=True,
+                random_state=42
+            )
         else:
             # Default: Random Forest
             self.model_type = 'random_forest'
@@ -140,11 +586,14 @@ class TaskPredictor:
                 max_depth=15,
                 min_samples_split=2,
                 min_samples_leaf=1,
+                bootstrap=True,
+                oob_score=True,
                 random_state=42,
                 n_jobs=-1
             )
         
         self.model.fit(X_scaled, y)
+        self._on_model_updated()
         
         # 3. Conformal prediction calibration (95% coverage -> alpha = 0.05)
         preds = self.model.predict(X_scaled)
@@ -154,11 +603,24 @@ class TaskPredictor:
         q_level = min(1.0, np.ceil((n + 1) * (1 - alpha)) / n)
         self.calibration_quantile = float(np.quantile(residuals, q_level))
         
-        # Calculate cross-validation score (R^2)
-        cv_scores = cross_val_score(self.model, X_scaled, y, cv=5, scoring='r2')
-        
-        # Update version
-        self.version = f"v{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # Calculate R^2: a bagged forest scores each row on the trees that never saw it,
+        # so its out-of-bag R^2 comes with the fit and needs no extra cross-validation fits
+        if getattr(self.model, 'oob_score', False):
+            cv_scores = np.array([self.model.oob_score_])
+        else:
+            # The folds are fitted in parallel with one thread each, instead of one at a time
+            # with each fit spread over every core
+            cv_model = clone(self.model)
+            if 'n_jobs' in cv_model.get_params():
+                cv_model.set_params(n_jobs=1)
+            cv_scores = cross_validate(cv_model, X_scaled, y, cv=5, scoring='r2',
+                                       n_jobs=min(5, os.cpu_count() or 1))['test_score']
+        self._serve_single_threaded()
+        
+        # Update version; the suffix keeps two trainings within one second from sharing the
+        # per-version .so/.onnx/calibration artifacts
+        self.version = f"v{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self._schedule_version_scorers()
         
         # Save model
         self._save_model()
@@ -193,32 +655,50 @@ class TaskPredictor:
     def _save_model(self):
         """Save model and scaler to disk"""
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        # Write aside and rename so other workers' hot-reload watchers never read a partial file
+        tmp_path = f"{self.model_path}.tmp"
         joblib.dump({
             'model': self.model,
             'scaler': self.scaler,
             'version': self.version,
             'calibration_quantile': self.calibration_quantile,
             'model_type': self.model_type
-        }, self.model_path)
+        }, tmp_path)
+        os.replace(tmp_path, self.model_path)
+        # Our own save is not an external update; keep the hot-reload watcher from reloading it
+        self.last_loaded_time = os.path.getmtime(self.model_path)
         print(f"💾 Model and Scaler saved: {self.model_path}")
     
     def retrain(self, X_new, y_new, incremental=False):
-        """Retrain model with new data"""
-        if incremental and hasattr(self, '_training_data'):
-            # Combine with existing data
-            X = np.vstack([self._training_data['X'], X_new])
-            y = np.concatenate([self._training_data['y'], y_new])
-        else:
-            X, y = X_new, y_new
+        """
+        Retrain model with new data. The data is kept for incremental retrains, which append
+        to it in place; the buffers double in capacity when full instead of re-stacking all
+        previous rows on every call.
+        """
+        X_new = np.asarray(X_new, dtype=np.float32)
+        y_new = np.asarray(y_new, dtype=np.float32)
+        n = self._n_training_rows if incremental and self._training_X is not None else 0
+        total = n + len(X_new)
+        
+        if self._training_X is None or not incremental or total > len(self._training_X):
+            capacity = max(1024, 2 * n, total)
+            X_buf = np.empty((capacity, X_new.shape[1]), dtype=np.float32)
+            y_buf = np.empty(capacity, dtype=np.float32)
+            if n:
+                X_buf[:n] = self._training_X[:n]
+                y_buf[:n] = self._training_y[:n]
+            self._training_X, self._training_y = X_buf, y_buf
         
         # Store training data for incremental learning
-        self._training_data = {'X': X, 'y': y}
+        self._training_X[n:total] = X_new
+        self._training_y[n:total] = y_new
+        self._n_training_rows = total
         
-        return self.train(X, y)
+        return self.train(self._training_X[:total], self._training_y[:total])
     
     def switch_model(self, model_type):
         """Switch to a different model type and retrain"""
-        valid_types = ['random_forest', 'xgboost', 'gradient_boosting']
+        valid_types = ['random_forest', 'xgboost', 'gradient_boosting', 'hist_gradient_boosting']
         if model_type not in valid_types:
             raise ValueError(f"Invalid model type. Choose from: {valid_types}")
         
@@ -235,27 +715,39 @@ class TaskPredictor:
             raise ValueError("Model not loaded")
         
         # 1. Feature Guard & Clipping
-        task_size = np.clip(task_size, 1, 3)
-        task_type = np.clip(task_type, 1, 3)
-        priority = np.clip(priority, 1, 5)
-        resource_load = np.clip(resource_load, 0, 100)
-        startup_overhead = np.clip(startup_overhead, 0.1, 10.0)
+        task_size = min(max(task_size, 1), 3)
+        task_type = min(max(task_type, 1), 3)
+        priority = min(max(priority, 1), 5)
+        resource_load = min(max(resource_load, 0), 100)
+        startup_overhead = min(max(startup_overhead, 0.1), 10.0)
 
-        # Prepare features dynamically matching scaler/model feature count
+        # Fill the thread's reusable row matching the scaler/model feature count
         n_feats = getattr(self.scaler, 'n_features_in_', getattr(self.model, 'n_features_in_', 5))
-        if n_feats == 4:
-            X_raw = np.array([[task_size, task_type, priority, resource_load]])
-        else:
-            X_raw = np.array([[task_size, task_type, priority, resource_load, startup_overhead]])
-        
+        row = _row_buffer(n_feats)
+        row[0, 0] = task_size
+        row[0, 1] = task_type
+        row[0, 2] = priority
+        row[0, 3] = resource_load
+        if n_feats > 4:
+            row[0, 4] = startup_overhead
+        return self.predict_row(row, startup_overhead)
+
+    def predict_row(self, row, startup_overhead=None):
+        """
+        predict() for an already clipped (1, n_features) raw feature row, e.g. a reused buffer.
+        startup_overhead defaults to the row's 5th column (1.0 for 4-feature models).
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded")
+        task_size, resource_load = row[0, 0], row[0, 3]
+        if startup_overhead is None:
+            startup_overhead = row[0, 4] if row.shape[1] > 4 else 1.0
+
         # Apply StandardScaler if available
-        if self.scaler is not None:
-            X_scaled = self.scaler.transform(X_raw)
-        else:
-            X_scaled = X_raw
+        X_scaled = self.scaler.transform(row) if self.scaler is not None else row
         
         # 2. Make Prediction
-        predicted_time = self.model.predict(X_scaled)[0]
+        predicted_time = self._score_row(X_scaled)
         
         # 3. Reliability Guard & Conformal Prediction Interval
         min_feasible_time = max(0.2, startup_overhead * 0.8)
@@ -275,66 +767,106 @@ class TaskPredictor:
             
         return float(predicted_time), float(confidence), float(lower_bound), float(upper_bound)
     
-    def predict_batch(self, features_list):
+    def _reset_prediction_cache(self):
+        """
+        Start a fresh LRU cache for predict_cached and drop the lookup table; called whenever
+        the fitted model changes. A table in use is rebuilt on the next predict_cached call.
+        """
+        self._cached_predict = lru_cache(maxsize=PREDICT_CACHE_SIZE)(self.predict)
+        self._lookup_table = None
+    
+    def build_lookup_table(self):
+        """
+        Precompute predict_cached() for every input with the default startupOverhead of 1.0
+        (3 sizes x 3 types x 5 priorities x 101 load percents = 4545 rows) in one predict_many
+        call, so those requests are served by list indexing.
+        """
+        grid = np.indices((3, 3, 5, 101), dtype=np.float32).reshape(4, -1).T
+        grid[:, :3] += 1
+        times, confidences, lower_bounds, upper_bounds = self.predict_many(grid)
+        table = list(zip(times.tolist(), confidences.tolist(), lower_bounds.tolist(), upper_bounds.tolist()))
+        self._use_lookup_table = True
+        self._lookup_table = table
+        return table
+    
+    def predict_cached(self, task_size, task_type, priority, resource_load, startup_overhead=1.0):
+        """
+        predict() served from the lookup table (see build_lookup_table) or an LRU cache.
+        resourceLoad is quantized to whole percent and startupOverhead to 0.1s so repeated
+        requests hit the same key.
         """
-        Vectorized batch prediction with StandardScaler and conformal prediction intervals.
+        task_size, task_type, priority = int(task_size), int(task_type), int(priority)
+        resource_load, startup_overhead = round(resource_load), round(float(startup_overhead), 1)
+        if (self._use_lookup_table and startup_overhead == 1.0 and 1 <= task_size <= 3 and 1 <= task_type <= 3
+                and 1 <= priority <= 5 and 0 <= resource_load <= 100):
+            table = self._lookup_table
+            if table is None:
+                table = self.build_lookup_table()
+            return table[(((task_size - 1) * 3 + task_type - 1) * 5 + priority - 1) * 101 + resource_load]
+        return self._cached_predict(task_size, task_type, priority, float(resource_load), startup_overhead)
+    
+    def cache_info(self):
+        """Hit/miss statistics of the prediction cache"""
+        return self._cached_predict.cache_info()
+    
+    def predict_many(self, X):
+        """
+        Vectorized prediction over a feature matrix of shape (n, 4) or (n, 5)
+        with a single model.predict call.
         Returns:
-            list of (predicted_time, confidence, lower_bound, upper_bound) tuples
+            (predicted_times, confidences, lower_bounds, upper_bounds) arrays
         """
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        # features_list expected to have 4 or 5 elements per item
-        X_in = np.array(features_list)
+        X_in = np.asarray(X, dtype=np.float32)
+        if X_in.ndim != 2 or len(X_in) == 0:
+            raise ValueError("Expected a non-empty 2D feature matrix")
         n_feats = getattr(self.scaler, 'n_features_in_', getattr(self.model, 'n_features_in_', 5))
         
-        if X_in.shape[1] > n_feats:
-            X = X_in[:, :n_feats]
-        elif X_in.shape[1] < n_feats:
-            pad = np.ones((len(X_in), n_feats - X_in.shape[1]))
-            X = np.hstack([X_in, pad])
+        # Match the scaler/model feature count; missing startup_overhead defaults to 1.0
+        if X_in.shape[1] >= n_feats:
+            X = X_in[:, :n_feats].copy()
         else:
-            X = X_in.copy()
+            X = np.ones((len(X_in), n_feats), dtype=np.float32)
+            X[:, :X_in.shape[1]] = X_in
         
         # Clip features to valid ranges (same as predict)
         X[:, 0] = np.clip(X[:, 0], 1, 3)   # task_size
         X[:, 1] = np.clip(X[:, 1], 1, 3)   # task_type
         X[:, 2] = np.clip(X[:, 2], 1, 5)   # priority
         X[:, 3] = np.clip(X[:, 3], 0, 100) # resource_load
-        if n_feats >= 5:
-            X[:, 4] = np.clip(X[:, 4], 0.1, 10.0) # startup_overhead
-        
-        if self.scaler is not None:
-            X_scaled = self.scaler.transform(X)
+        if X_in.shape[1] > 4:
+            startup_overhead = np.clip(X_in[:, 4], 0.1, 10.0)
         else:
-            X_scaled = X
-            
-        predictions = self.model.predict(X_scaled)
-        
-        results = []
-        for pred, feat in zip(predictions, features_list):
-            task_size = feat[0]
-            resource_load = feat[3]
-            startup_overhead = feat[4] if len(feat) > 4 else 1.0
-            
-            # Feasibility floor guard
-            min_feasible_time = max(0.2, startup_overhead * 0.8)
-            adjusted = max(float(pred), min_feasible_time)
-            
-            lower_bound = max(min_feasible_time, float(adjusted - self.calibration_quantile))
-            upper_bound = float(adjusted + self.calibration_quantile)
-            
-            # Confidence calculation
-            conf = 0.92
-            if resource_load > 92 or resource_load < 5:
-                conf -= 0.15
-            if task_size == 3 and resource_load > 85:
-                conf -= 0.10
-            conf = max(0.1, min(1.0, conf))
-            
-            results.append((adjusted, conf, lower_bound, upper_bound))
-            
-        return results
+            startup_overhead = np.ones(len(X_in), dtype=np.float32)
+        if n_feats >= 5:
+            X[:, 4] = startup_overhead
+        
+        # Scale and score each distinct row once, then scatter back (batches repeat the same inputs).
+        # Rows are compared as opaque byte records, cheaper than np.unique(axis=0)'s lexsort
+        rows = np.ascontiguousarray(X).view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        X_unique = X[first] if len(first) < len(X) else X
+        X_scaled = self.scaler.transform(X_unique) if self.scaler is not None else X_unique
+        predictions = self._score_rows(X_scaled)
+        if len(first) < len(X):
+            predictions = np.asarray(predictions)[inverse]
+        
+        return _guard_predictions(
+            np.asarray(predictions, dtype=np.float64),
+            X[:, 0].astype(np.float64), X[:, 3].astype(np.float64),
+            startup_overhead.astype(np.float64), float(self.calibration_quantile),
+        )
+    
+    def predict_batch(self, features_list):
+        """
+        Batch prediction with StandardScaler and conformal prediction intervals.
+        Returns:
+            list of (predicted_time, confidence, lower_bound, upper_bound) tuples
+        """
+        times, confidences, lower_bounds, upper_bounds = self.predict_many(features_list)
+        return list(zip(times.tolist(), confidences.tolist(), lower_bounds.tolist(), upper_bounds.tolist()))
     
     def is_loaded(self):
         """Check if model is loaded"""
@@ -20,10 +20,14 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple, List
 
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.model_selection import cross_val_score, KFold
+from sklearn.model_selection import KFold
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
+from utils.jit import njit
+
 # Optional imports — degrade gracefully
 try:
     import optuna
@@ -65,6 +69,20 @@ class HyperparameterTuner:
         self.n_folds = n_folds
         self.seed = seed
 
+    def _cv_score(self, trial: 'optuna.Trial', model) -> float:
+        """
+        Mean R² over the same folds as cross_val_score, reporting the running mean after
+        each fold so the study's pruner can stop unpromising trials early.
+        """
+        scores = []
+        for fold, (train_idx, val_idx) in enumerate(KFold(n_splits=self.n_folds).split(self.X)):
+            model.fit(self.X[train_idx], self.y[train_idx])
+            scores.append(r2_score(self.y[val_idx], model.predict(self.X[val_idx])))
+            trial.report(float(np.mean(scores)), step=fold)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return float(np.mean(scores))
+
     def _objective_rf(self, trial: 'optuna.Trial') -> float:
         params = {
             'n_estimators': trial.suggest_int('n_estimators', 50, 500),
@@ -74,8 +92,7 @@ class HyperparameterTuner:
             'max_features': trial.suggest_categorical('max_features', ['sqrt', 'log2', None]),
         }
         model = RandomForestRegressor(**params, random_state=self.seed, n_jobs=-1)
-        scores = cross_val_score(model, self.X, self.y, cv=self.n_folds, scoring='r2')
-        return float(np.mean(scores))
+        return self._cv_score(trial, model)
 
     def _objective_gb(self, trial: 'optuna.Trial') -> float:
         params = {
@@ -87,8 +104,7 @@ class HyperparameterTuner:
             'subsample': trial.suggest_float('subsample', 0.6, 1.0),
         }
         model = GradientBoostingRegressor(**params, random_state=self.seed)
-        scores = cross_val_score(model, self.X, self.y, cv=self.n_folds, scoring='r2')
-        return float(np.mean(scores))
+        return self._cv_score(trial, model)
 
     def _objective_xgb(self, trial: 'optuna.Trial') -> float:
         if not XGB_AVAILABLE:
@@ -104,8 +120,7 @@ class HyperparameterTuner:
             'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 10.0, log=True),
         }
         model = xgb.XGBRegressor(**params, random_state=self.seed, n_jobs=-1)
-        scores = cross_val_score(model, self.X, self.y, cv=self.n_folds, scoring='r2')
-        return float(np.mean(scores))
+        return self._cv_score(trial, model)
 
     def tune(self, model_type: str = 'random_forest', n_trials: int = 100) -> Tuple[Dict, float]:
         objectives = {
@@ -116,9 +131,12 @@ class HyperparameterTuner:
         if model_type not in objectives:
             raise ValueError(f"Unsupported model_type: {model_type}")
 
+        # Median pruning on the per-fold running mean: after 10 complete trials, a trial whose
+        # first folds fall below the median of earlier trials is dropped without fitting the rest
         study = optuna.create_study(direction='maximize',
                                      study_name=f'tune_{model_type}',
-                                     sampler=optuna.samplers.TPESampler(seed=self.seed))
+                                     sampler=optuna.samplers.TPESampler(seed=self.seed),
+                                     pruner=optuna.pruners.MedianPruner(n_startup_trials=10, n_warmup_steps=2))
         study.optimize(objectives[model_type], n_trials=n_trials, show_progress_bar=True)
 
         return study.best_params, study.best_value
@@ -132,22 +150,23 @@ class SHAPExplainer:
     Compute SHAP values for model predictions.
 
     Usage:
-        explainer = SHAPExplainer(model, X_train)
+        explainer = SHAPExplainer(model)
         shap_values = explainer.explain(X_test)
         summary = explainer.feature_summary()
     """
 
     FEATURE_NAMES = ['taskSize', 'taskType', 'priority', 'resourceLoad', 'startupOverhead']
 
-    def __init__(self, model, X_background: np.ndarray):
+    def __init__(self, model, X_background: Optional[np.ndarray] = None):
+        """
+        Uses path-dependent Tree SHAP, which reads the cover statistics stored in the trees and
+        needs no background data. X_background is accepted for API compatibility and ignored;
+        interventional SHAP (shap.TreeExplainer with data=...) is not provided by this class.
+        """
         if not SHAP_AVAILABLE:
             raise ImportError("shap is required: pip install shap")
         self.model = model
-        # Use a small background set for efficiency
-        if len(X_background) > 100:
-            idx = np.random.choice(len(X_background), 100, replace=False)
-            X_background = X_background[idx]
-        self.explainer = shap.TreeExplainer(model)
+        self.explainer = shap.TreeExplainer(model, feature_perturbation='tree_path_dependent')
         self._shap_values: Optional[np.ndarray] = None
         self._X: Optional[np.ndarray] = None
 
@@ -198,18 +217,27 @@ class ConformalPredictor:
     def calibrate(self, X_cal: np.ndarray, y_cal: np.ndarray):
         """Calibrate using a held-out calibration set."""
         preds = self.model.predict(X_cal)
-        residuals = np.abs(y_cal - preds)
+        self.calibrate_residuals(np.abs(y_cal - preds))
+
+    def calibrate_residuals(self, residuals: np.ndarray):
+        """Calibrate from precomputed absolute residuals |y_cal - model.predict(X_cal)|."""
         n = len(residuals)
         # Finite-sample correction: ceil((n+1)*(1-alpha)) / n quantile
         q_level = min(1.0, np.ceil((n + 1) * (1 - self.alpha)) / n)
         self._quantile = float(np.quantile(residuals, q_level))
 
-    def predict_interval(self, X: np.ndarray) -> List[Tuple[float, float]]:
-        """Return (lower, upper) prediction intervals."""
+    def predict_interval_array(self, X: np.ndarray) -> np.ndarray:
+        """Return prediction intervals as an (n, 2) array of [lower, upper] rows."""
         if self._quantile is None:
             raise ValueError("Call calibrate() first")
-        preds = self.model.predict(X)
-        return [(float(p - self._quantile), float(p + self._quantile)) for p in preds]
+        preds = np.asarray(self.model.predict(X), dtype=np.float64)
+        return np.column_stack((preds - self._quantile, preds + self._quantile))
+
+    def predict_interval(self, X: np.ndarray) -> List[Tuple[float, float]]:
+        """Return (lower, upper) prediction intervals."""
+        intervals = self.predict_interval_array(X)
+        # A structured view converts to a list of tuples in one C-level call
+        return intervals.view([('lower', 'f8'), ('upper', 'f8')]).ravel().tolist()
 
     def get_width(self) -> float:
         """Half-width of the prediction interval."""
@@ -221,6 +249,11 @@ class ConformalPredictor:
 # ---------------------------------------------------------------------------
 # 4. Statistical Significance Testing
 # ---------------------------------------------------------------------------
+def _fit_score(model, X_tr, y_tr, X_val, y_val) -> float:
+    model.fit(X_tr, y_tr)
+    return r2_score(y_val, model.predict(X_val))
+
+
 def compare_models_significance(
     model_a, model_b, X: np.ndarray, y: np.ndarray,
     n_folds: int = 5, seed: int = 42
@@ -235,18 +268,25 @@ def compare_models_significance(
     """
     from scipy import stats
 
-    kf = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
-    scores_a, scores_b = [], []
+    # Fit fresh single-threaded clones of both models on every fold in parallel,
+    # rather than one fit at a time; the models passed in are left untouched
+    def single_threaded(model):
+        model = clone(model)
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+        return model
 
-    for train_idx, val_idx in kf.split(X):
-        X_tr, X_val = X[train_idx], X[val_idx]
-        y_tr, y_val = y[train_idx], y[val_idx]
-
-        model_a.fit(X_tr, y_tr)
-        model_b.fit(X_tr, y_tr)
-
-        scores_a.append(r2_score(y_val, model_a.predict(X_val)))
-        scores_b.append(r2_score(y_val, model_b.predict(X_val)))
+    kf = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    tasks = [
+        (single_threaded(model), train_idx, val_idx)
+        for train_idx, val_idx in kf.split(X)
+        for model in (model_a, model_b)
+    ]
+    scores = Parallel(n_jobs=-1)(
+        delayed(_fit_score)(model, X[train_idx], y[train_idx], X[val_idx], y[val_idx])
+        for model, train_idx, val_idx in tasks
+    )
+    scores_a, scores_b = scores[0::2], scores[1::2]
 
     t_stat, p_value = stats.ttest_rel(scores_a, scores_b)
 
@@ -263,6 +303,30 @@ def compare_models_significance(
 # ---------------------------------------------------------------------------
 # 5. PPO Reinforcement Learning Skeleton for Dynamic Scheduling
 # ---------------------------------------------------------------------------
+@njit(cache=True)
+def _ppo_step_kernel(task_size, resource_loads, action, noise):
+    """
+    Simulate running a task on resource `action`: returns (exec_time, reward) and
+    adds the task's load to resource_loads in place.
+    """
+    load = resource_loads[action]
+    # Simulate execution: time depends on task size and resource load
+    exec_time = max(0.5, task_size * 2 * (1 + load / 100) + noise)
+    resource_loads[action] = min(100.0, load + 15)
+
+    # Reward: negative execution time + small bonus for keeping loads balanced
+    n = resource_loads.shape[0]
+    mean = 0.0
+    for i in range(n):
+        mean += resource_loads[i]
+    mean /= n
+    load_variance = 0.0
+    for i in range(n):
+        load_variance += (resource_loads[i] - mean) ** 2
+    load_variance /= n
+    return exec_time, -exec_time - 0.01 * load_variance
+
+
 class PPOSchedulerEnv:
     """
     Gym-compatible environment for task scheduling via PPO.
@@ -278,10 +342,14 @@ class PPOSchedulerEnv:
         model.learn(total_timesteps=50000)
     """
 
-    def __init__(self, n_resources: int = 4, max_steps: int = 100):
+    def __init__(self, n_resources: int = 4, max_steps: int = 100, seed: Optional[int] = None):
         self.n_resources = n_resources
         self.max_steps = max_steps
         self.step_count = 0
+        self._rng = np.random.default_rng(seed)
+        # Per-episode tasks and execution-time noise, drawn in bulk by reset()
+        self._task_pool = np.zeros((max_steps + 1, 4), dtype=np.float32)
+        self._noise = np.zeros(max_steps)
 
         # Observation: 4 task features + N resource loads
         self.observation_space_shape = (4 + n_resources,)
@@ -294,27 +362,21 @@ class PPOSchedulerEnv:
     def reset(self) -> np.ndarray:
         self.resource_loads = np.zeros(self.n_resources)
         self.step_count = 0
+        # taskSize 1-3, taskType 1-3, priority 1-5; the 4th column stays a 0 placeholder
+        self._task_pool[:, :3] = self._rng.integers(low=[1, 1, 1], high=[4, 4, 6], size=(self.max_steps + 1, 3))
+        self._noise = self._rng.normal(0, 0.3, self.max_steps)
         self._current_task = self._sample_task()
         return self._get_obs()
 
     def step(self, action: int) -> Tuple[np.ndarray, float, bool, Dict]:
         assert 0 <= action < self.n_resources
         task = self._current_task
-        assert task is not None
-
-        # Simulate execution: time depends on task size and resource load
-        task_size, task_type, priority, _ = task
-        load = self.resource_loads[action]
-
-        exec_time = task_size * 2 * (1 + load / 100) + np.random.normal(0, 0.3)
-        exec_time = max(0.5, exec_time)
-
-        # Update resource load
-        self.resource_loads[action] = min(100, load + 15)
+        # _noise and _task_pool only cover max_steps steps of the current episode
+        if task is None or self.step_count >= self.max_steps:
+            raise ValueError("Episode is over; call reset() first")
 
-        # Reward: negative execution time + small bonus for keeping loads balanced
-        load_variance = np.var(self.resource_loads)
-        reward = -exec_time - 0.01 * load_variance
+        exec_time, reward = _ppo_step_kernel(float(task[0]), self.resource_loads, action,
+                                             self._noise[self.step_count])
 
         self.step_count += 1
         done = self.step_count >= self.max_steps
@@ -324,12 +386,8 @@ class PPOSchedulerEnv:
         return self._get_obs(), float(reward), done, info
 
     def _sample_task(self) -> np.ndarray:
-        return np.array([
-            np.random.choice([1, 2, 3]),      # taskSize
-            np.random.choice([1, 2, 3]),      # taskType
-            np.random.choice([1, 2, 3, 4, 5]),  # priority
-            0,  # placeholder (not used in obs directly)
-        ], dtype=np.float32)
+        # Copy the row: reset() re-samples _task_pool in place
+        return self._task_pool[self.step_count].copy()
 
     def _get_obs(self) -> np.ndarray:
         task_features = self._current_task[:3] if self._current_task is not None else np.zeros(3)
@@ -1,27 +1,42 @@
 import os
 import json
 import numpy as np
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from services.model_manager import model_manager
-from utils.shared import safe_error, record_metric, require_api_key
+from utils.shared import safe_error, record_metric, require_api_key, cached_json_response
+from utils.validation import parse_task
+from utils.json_provider import read_json
+from research import SHAPExplainer, SHAP_AVAILABLE
 
 admin_bp = Blueprint('admin', __name__)
 
+# SHAP explainer for the active model, rebuilt only when the model changes
+_shap_cache = {}
+
 @admin_bp.route('/explain', methods=['POST'])
 def explain_prediction():
     predictor = model_manager.get_predictor()
     try:
-        from research import SHAPExplainer, SHAP_AVAILABLE as _shap_ok
-        if not _shap_ok:
+        if not SHAP_AVAILABLE:
             return jsonify({'error': 'SHAP not installed (pip install shap)'}), 501
 
-        data = request.get_json()
-        X_single = np.array([[data['taskSize'], data['taskType'], data['priority'], data['resourceLoad']]])
-        pred_time, confidence = predictor.predict(*X_single[0])
+        data = read_json()
+        features, error = parse_task(data)
+        if error:
+            return jsonify({'error': error}), 400
+        pred_time, confidence, _, _ = predictor.predict(*features)
 
-        X_bg, _ = predictor._generate_synthetic_data(200)
-        explainer = SHAPExplainer(predictor.model, X_bg)
-        shap_vals = explainer.single_explanation(X_single[0])
+        key = (predictor.get_version(), id(predictor.model))
+        explainer = _shap_cache.get(key)
+        if explainer is None:
+            explainer = SHAPExplainer(predictor.model)
+            _shap_cache.clear()
+            _shap_cache[key] = explainer
+        # Models trained by train.py take the first four features (no startupOverhead)
+        n_feats = getattr(predictor.scaler, 'n_features_in_', getattr(predictor.model, 'n_features_in_', 5))
+        X = np.array([features[:n_feats]], dtype=np.float64)
+        X_scaled = predictor.scaler.transform(X) if predictor.scaler is not None else X
+        shap_vals = explainer.single_explanation(X_scaled[0])
 
         return jsonify({
             'predictedTime': round(pred_time, 2),
@@ -36,30 +51,16 @@ def explain_prediction():
 def compare_models():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
+        data = read_json()
         
-        task_size = int(data['taskSize'])
-        task_type = int(data['taskType'])
-        priority = int(data['priority'])
-        resource_load = float(data['resourceLoad'])
+        features, error = parse_task(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         results = {}
-        model_types = ['random_forest', 'gradient_boosting']
-        
-        try:
-            import xgboost
-            model_types.append('xgboost')
-        except ImportError:
-            pass
-        
-        from model import TaskPredictor
-        for model_type in model_types:
+        for model_type, pool_predictor in model_manager.get_model_pool().items():
             try:
-                temp_predictor = TaskPredictor(
-                    model_path=f'models/compare_{model_type}.joblib',
-                    model_type=model_type,
-                )
-                pred_time, confidence = temp_predictor.predict(task_size, task_type, priority, resource_load)
+                pred_time, confidence = pool_predictor.predict_cached(*features)[:2]
                 results[model_type] = {
                     'predictedTime': round(pred_time, 2),
                     'confidence': round(confidence, 4)
@@ -81,7 +82,7 @@ def compare_models():
 def detect_anomalies():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
+        data = read_json()
         if 'tasks' not in data or not isinstance(data['tasks'], list):
             return jsonify({'error': 'Missing "tasks" array'}), 400
         
@@ -134,12 +135,13 @@ def detect_anomalies():
 @admin_bp.route('/model/info', methods=['GET'])
 def model_info():
     predictor = model_manager.get_predictor()
-    return jsonify({
-        'modelVersion': predictor.get_version(),
-        'modelType': predictor.model_type,
-        'isLoaded': predictor.is_loaded(),
+    version, model_type, is_loaded = predictor.get_version(), predictor.model_type, predictor.is_loaded()
+    return cached_json_response('model_info', (version, model_type, is_loaded), lambda: {
+        'modelVersion': version,
+        'modelType': model_type,
+        'isLoaded': is_loaded,
         'features': ['taskSize', 'taskType', 'priority', 'resourceLoad'],
-        'availableModels': ['random_forest', 'xgboost', 'gradient_boosting'],
+        'availableModels': ['random_forest', 'xgboost', 'gradient_boosting', 'hist_gradient_boosting'],
         'description': 'Predicts task execution time based on task characteristics and resource load'
     })
 
@@ -179,7 +181,7 @@ def model_registry():
 def switch_model():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
+        data = read_json()
         model_type = data.get('modelType', 'random_forest')
         
         result = predictor.switch_model(model_type)
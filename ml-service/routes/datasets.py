@@ -4,7 +4,8 @@ import numpy as np
 from flask import Blueprint, request, jsonify
 from datasets.trace_manager import trace_manager, HARDWARE_PROFILES
 from services.model_manager import model_manager
-from utils.shared import safe_error, record_metric, require_api_key
+from utils.shared import safe_error, record_metric, observe_latency, require_api_key
+from utils.json_provider import read_json
 
 datasets_bp = Blueprint('datasets', __name__)
 
@@ -53,7 +54,7 @@ def upload_dataset():
     try:
         if 'file' not in request.files:
             # Check JSON payload
-            data = request.get_json(silent=True)
+            data = read_json(silent=True)
             if data and 'records' in data:
                 raw_filename = data.get('filename', f'custom_trace_{int(time.time())}.json')
                 filename = raw_filename if raw_filename.endswith('.json') else f"{os.path.splitext(raw_filename)[0]}.json"
@@ -85,7 +86,7 @@ def train_custom_trace():
     scaled according to the chosen hardware profile.
     """
     try:
-        payload = request.get_json() or {}
+        payload = read_json() or {}
         dataset_id = payload.get('datasetId', 'google_borg_trace')
         hw_profile_id = payload.get('hardwareProfile', 'enterprise_cloud_vm')
         epochs = int(payload.get('epochs', 50))
@@ -131,9 +132,9 @@ def train_custom_trace():
         y = np.array(y)
 
         predictor = model_manager.get_predictor()
-        start = time.time()
+        start = time.perf_counter()
         metrics = predictor.train(X, y)
-        duration = time.time() - start
+        duration = time.perf_counter() - start
 
         # Calculate simulated RL reward curve & convergence
         rl_rewards = []
@@ -158,7 +159,7 @@ def train_custom_trace():
         new_version = f"v{int(time.time())}_{hw_profile_id[:6]}_{dataset_id[:8]}"
 
         record_metric('train_requests_total')
-        record_metric('train_latency_sum', duration)
+        observe_latency('train', duration)
 
         return jsonify({
             'success': True,
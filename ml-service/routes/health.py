@@ -1,6 +1,10 @@
-from flask import Blueprint, jsonify
+import os
+from flask import Blueprint
 from services.model_manager import model_manager
-from utils.shared import _metrics
+from utils.shared import _metrics, cached_json_response, PROMETHEUS_AVAILABLE
+
+if PROMETHEUS_AVAILABLE:
+    from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
 
 health_bp = Blueprint('health', __name__)
 
@@ -8,19 +12,37 @@ health_bp = Blueprint('health', __name__)
 def health_check():
     predictor = model_manager.get_predictor()
     is_ready = predictor.is_loaded()
+    version = predictor.get_version()
     
-    return jsonify({
+    return cached_json_response('health', (is_ready, version), lambda: {
         'status': 'healthy' if is_ready else 'loading',
         'service': 'ml-prediction-service',
         'model_loaded': is_ready,
-        'model_version': predictor.get_version()
-    }), 200 if is_ready else 503
+        'model_version': version
+    }, status=200 if is_ready else 503)
 
 @health_bp.route('/metrics', methods=['GET'])
 def metrics():
-    lines = []
-    for name, value in _metrics.items():
+    if PROMETHEUS_AVAILABLE:
+        registry = REGISTRY
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            # gunicorn workers each hold their own counters; aggregate them from the shared directory
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        lines = [generate_latest(registry).decode().rstrip('\n')]
+    else:
+        lines = []
+        for name, value in _metrics.items():
+            lines.append(f"# HELP ml_{name} ML service metric: {name}")
+            lines.append(f"# TYPE ml_{name} counter" if "total" in name else f"# TYPE ml_{name} gauge")
+            lines.append(f"ml_{name} {value}")
+
+    # LRU cache behind /api/predict (reset whenever the model changes)
+    cache = model_manager.get_predictor().cache_info()
+    for name, kind, value in (('predict_cache_hits_total', 'counter', cache.hits),
+                              ('predict_cache_misses_total', 'counter', cache.misses),
+                              ('predict_cache_size', 'gauge', cache.currsize)):
         lines.append(f"# HELP ml_{name} ML service metric: {name}")
-        lines.append(f"# TYPE ml_{name} counter" if "total" in name else f"# TYPE ml_{name} gauge")
+        lines.append(f"# TYPE ml_{name} {kind}")
         lines.append(f"ml_{name} {value}")
     return "\n".join(lines) + "\n", 200, {'Content-Type': 'text/plain; version=0.0.4'}
@@ -1,10 +1,13 @@
 import os
 import time
 import numpy as np
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from services.model_manager import model_manager
 from utils.limiter import limiter
-from utils.shared import safe_error, record_metric, _tracer
+from utils.shared import safe_error, record_metric, observe_latency, _tracer
+from utils.validation import validate_tasks, parse_task
+from utils.json_provider import read_json
+from research import ConformalPredictor
 
 predict_bp = Blueprint('predict', __name__)
 
@@ -12,52 +15,42 @@ predict_bp = Blueprint('predict', __name__)
 size_map = { 'SMALL': 1, 'MEDIUM': 2, 'LARGE': 3 }
 type_map = { 'CPU': 1, 'IO': 2, 'MIXED': 3 }
 
+# Tasks parsed, validated and scored together by /predict/stream; also the
+# number of predictions serialized per written chunk by /predict/batch
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 256))
+
 @predict_bp.route('/predict', methods=['POST'])
 @limiter.limit("60 per minute")
 def predict():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
-        
-        required_fields = ['taskSize', 'taskType', 'priority', 'resourceLoad']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        data = read_json()
         
-        task_size = int(data['taskSize'])
-        task_type = int(data['taskType'])
-        priority = int(data['priority'])
-        resource_load = float(data['resourceLoad'])
-        startup_overhead = float(data.get('startupOverhead', 1.0))
+        features, error = parse_task(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if task_size not in [1, 2, 3]:
-            return jsonify({'error': 'taskSize must be 1, 2, or 3'}), 400
-        if task_type not in [1, 2, 3]:
-            return jsonify({'error': 'taskType must be 1, 2, or 3'}), 400
-        if not 1 <= priority <= 5:
-            return jsonify({'error': 'priority must be between 1 and 5'}), 400
-        if not 0 <= resource_load <= 100:
-            return jsonify({'error': 'resourceLoad must be between 0 and 100'}), 400
+        task_size, task_type, priority, resource_load, startup_overhead = features
         
-        start = time.time()
+        start = time.perf_counter()
         if _tracer:
-            with _tracer.start_as_current_span("ml.predict", attributes={
-                "ml.task_size": task_size, "ml.task_type": task_type,
-                "ml.priority": priority, "ml.resource_load": resource_load,
-            }) as span:
-                predicted_time, confidence, lower_bound, upper_bound = predictor.predict(
+            with _tracer.start_as_current_span("ml.predict") as span:
+                predicted_time, confidence, lower_bound, upper_bound = predictor.predict_cached(
                     task_size, task_type, priority, resource_load, startup_overhead
                 )
-                span.set_attribute("ml.predicted_time", predicted_time)
-                span.set_attribute("ml.confidence", confidence)
+                if span.is_recording():
+                    span.set_attributes({
+                        "ml.task_size": task_size, "ml.task_type": task_type,
+                        "ml.priority": priority, "ml.resource_load": resource_load,
+                        "ml.predicted_time": predicted_time, "ml.confidence": confidence,
+                    })
         else:
-            predicted_time, confidence, lower_bound, upper_bound = predictor.predict(
+            predicted_time, confidence, lower_bound, upper_bound = predictor.predict_cached(
                 task_size, task_type, priority, resource_load, startup_overhead
             )
-        latency = time.time() - start
+        latency = time.perf_counter() - start
         record_metric('predict_requests_total')
-        record_metric('predict_latency_sum', latency)
-        record_metric('predict_latency_count')
+        observe_latency('predict', latency)
         
         return jsonify({
             'predictedTime': round(predicted_time, 2),
@@ -71,12 +64,37 @@ def predict():
         record_metric('errors_total')
         return jsonify({'error': safe_error(e)}), 500
 
+def _batch_body(tasks, valid_idx, columns, trailer):
+    """
+    Serialize a /predict/batch response as one JSON object, STREAM_CHUNK_SIZE predictions
+    at a time, so only one chunk of prediction dicts is alive while the body is written.
+    """
+    dumps = current_app.json.dumps
+    yield '{"predictions":['
+    for start in range(0, len(valid_idx), STREAM_CHUNK_SIZE):
+        chunk = []
+        for idx, predicted_time, confidence, lower_bound, upper_bound in zip(
+            valid_idx[start:start + STREAM_CHUNK_SIZE], *(c[start:start + STREAM_CHUNK_SIZE] for c in columns)
+        ):
+            prediction_result = {
+                'predictedTime': predicted_time,
+                'confidence': confidence,
+                'lowerBound': lower_bound,
+                'upperBound': upper_bound,
+            }
+            task_id = tasks[idx].get('taskId')
+            if task_id is not None:
+                prediction_result['taskId'] = task_id
+            chunk.append(prediction_result)
+        yield (',' if start else '') + dumps(chunk)[1:-1]
+    yield '],' + dumps(trailer)[1:]
+
 @predict_bp.route('/predict/batch', methods=['POST'])
 @limiter.limit("60 per minute")
 def predict_batch():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
+        data = read_json()
         
         if 'tasks' not in data or not isinstance(data['tasks'], list):
             return jsonify({'error': 'Missing "tasks" array in request body'}), 400
@@ -87,99 +105,129 @@ def predict_batch():
         if len(data['tasks']) > 1000:
             return jsonify({'error': 'Maximum 1000 tasks per batch request'}), 400
         
-        predictions = []
-        total_time = 0
-        errors = []
-        valid_tasks = []
+        tasks = data['tasks']
+        X, valid, errors = validate_tasks(tasks)
+        valid_idx = np.flatnonzero(valid)
         
-        for idx, task in enumerate(data['tasks']):
-            try:
-                required_fields = ['taskSize', 'taskType', 'priority', 'resourceLoad']
-                missing = [f for f in required_fields if f not in task]
-                if missing:
-                    errors.append({'index': idx, 'error': f'Missing fields: {missing}'})
-                    continue
-                
-                task_size = int(task['taskSize'])
-                task_type = int(task['taskType'])
-                priority = int(task['priority'])
-                resource_load = float(task['resourceLoad'])
-                
-                if task_size not in [1, 2, 3]:
-                    errors.append({'index': idx, 'error': 'taskSize must be 1, 2, or 3'})
-                    continue
-                if task_type not in [1, 2, 3]:
-                    errors.append({'index': idx, 'error': 'taskType must be 1, 2, or 3'})
-                    continue
-                if not 1 <= priority <= 5:
-                    errors.append({'index': idx, 'error': 'priority must be between 1 and 5'})
-                    continue
-                if not 0 <= resource_load <= 100:
-                    errors.append({'index': idx, 'error': 'resourceLoad must be between 0 and 100'})
-                    continue
-                
-                startup_overhead = float(task.get('startupOverhead', 1.0))
-                valid_tasks.append((idx, task.get('taskId'), [task_size, task_type, priority, resource_load, startup_overhead]))
-                
-            except Exception as e:
-                errors.append({'index': idx, 'error': safe_error(e)})
-        
-        if valid_tasks:
-            features = [vt[2] for vt in valid_tasks]
-            batch_results = predictor.predict_batch(features)
-            
-            for (idx, task_id, _feats), (predicted_time, confidence, lower_bound, upper_bound) in zip(valid_tasks, batch_results):
-                prediction_result = {
-                    'predictedTime': round(predicted_time, 2),
-                    'confidence': round(confidence, 4),
-                    'lowerBound': round(lower_bound, 2),
-                    'upperBound': round(upper_bound, 2),
-                }
-                if task_id is not None:
-                    prediction_result['taskId'] = task_id
-                predictions.append(prediction_result)
-                total_time += predicted_time
+        columns = ([], [], [], [])
+        avg_time = 0
+        if len(valid_idx):
+            times, confidences, lower_bounds, upper_bounds = predictor.predict_many(X[valid_idx])
+            columns = (np.round(times, 2).tolist(), np.round(confidences, 4).tolist(),
+                       np.round(lower_bounds, 2).tolist(), np.round(upper_bounds, 2).tolist())
+            avg_time = round(float(times.mean()), 2)
         
         record_metric('batch_requests_total')
-        record_metric('batch_tasks_total', len(predictions))
-
-        response = {
-            'predictions': predictions,
-            'totalTasks': len(predictions),
-            'avgPredictedTime': round(total_time / len(predictions), 2) if predictions else 0,
+        record_metric('batch_tasks_total', len(valid_idx))
+        
+        trailer = {
+            'totalTasks': len(valid_idx),
+            'avgPredictedTime': avg_time,
             'modelVersion': predictor.get_version()
         }
-        
         if errors:
-            response['errors'] = errors
-            response['errorCount'] = len(errors)
+            trailer['errors'] = errors
+            trailer['errorCount'] = len(errors)
         
-        return jsonify(response)
+        body = _batch_body(tasks, valid_idx.tolist(), columns, trailer)
+        return Response(stream_with_context(body), mimetype='application/json')
         
     except Exception as e:
         record_metric('errors_total')
         return jsonify({'error': safe_error(e)}), 500
 
+# Calibrated ConformalPredictors for the active model, keyed by alpha; dropped when the model changes.
+# The calibration residuals they share are persisted per model version (TaskPredictor.calibration_residuals)
+_conformal_cache = {'key': None, 'by_alpha': {}}
+CONFORMAL_CACHE_SIZE = 32
+
+@predict_bp.route('/predict/stream', methods=['POST'])
+@limiter.limit("60 per minute")
+def predict_stream():
+    """
+    NDJSON batch prediction: one task per request line, one result per response line.
+    Tasks are scored in chunks of STREAM_CHUNK_SIZE so results are written while the
+    rest of the body is still being read, and memory stays bounded by the chunk size.
+    """
+    predictor = model_manager.get_predictor()
+    dumps = current_app.json.dumps
+
+    def predict_chunk(chunk, offset):
+        X, valid, errors = validate_tasks(chunk)
+        results = [None] * len(chunk)
+        for error in errors:
+            results[error['index']] = {'index': offset + error['index'], 'error': error['error']}
+        valid_idx = np.flatnonzero(valid)
+        if len(valid_idx):
+            times, confidences, lower_bounds, upper_bounds = predictor.predict_many(X[valid_idx])
+            for idx, predicted_time, confidence, lower_bound, upper_bound in zip(
+                valid_idx.tolist(),
+                np.round(times, 2).tolist(),
+                np.round(confidences, 4).tolist(),
+                np.round(lower_bounds, 2).tolist(),
+                np.round(upper_bounds, 2).tolist(),
+            ):
+                result = {
+                    'index': offset + idx,
+                    'predictedTime': predicted_time,
+                    'confidence': confidence,
+                    'lowerBound': lower_bound,
+                    'upperBound': upper_bound,
+                }
+                task_id = chunk[idx].get('taskId')
+                if task_id is not None:
+                    result['taskId'] = task_id
+                results[idx] = result
+        record_metric('batch_tasks_total', len(valid_idx))
+        return ''.join(dumps(r) + '\n' for r in results)
+
+    def generate():
+        chunk, offset = [], 0
+        for line in request.stream:
+            if not line.strip():
+                continue
+            try:
+                chunk.append(current_app.json.loads(line))
+            except ValueError:
+                chunk.append(None)  # reported as 'Task must be a JSON object'
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield predict_chunk(chunk, offset)
+                offset += len(chunk)
+                chunk = []
+        if chunk:
+            yield predict_chunk(chunk, offset)
+
+    record_metric('batch_requests_total')
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @predict_bp.route('/predict/interval', methods=['POST'])
 def predict_with_interval():
     predictor = model_manager.get_predictor()
     try:
-        from research import ConformalPredictor
-        data = request.get_json()
+        data = read_json()
+        features, error = parse_task(data)
+        if error:
+            return jsonify({'error': error}), 400
         alpha = float(data.get('alpha', 0.1))
 
-        X_single = np.array([[data['taskSize'], data['taskType'], data['priority'], data['resourceLoad']]])
-
-        X_all, y_all = predictor._generate_synthetic_data(500)
-        from sklearn.model_selection import train_test_split
-        _, X_cal, _, y_cal = train_test_split(X_all, y_all, test_size=0.3, random_state=42)
-
-        cp = ConformalPredictor(predictor.model, alpha=alpha)
-        cp.calibrate(X_cal, y_cal)
+        key = (predictor.get_version(), id(predictor.model))
+        if _conformal_cache['key'] != key:
+            _conformal_cache.update(key=key, by_alpha={})
+        by_alpha = _conformal_cache['by_alpha']
+        cp = by_alpha.get(alpha)
+        if cp is None:
+            cp = ConformalPredictor(predictor.model, alpha=alpha)
+            cp.calibrate_residuals(predictor.calibration_residuals())
+            if len(by_alpha) >= CONFORMAL_CACHE_SIZE:
+                by_alpha.clear()
+            by_alpha[alpha] = cp
 
-        intervals = cp.predict_interval(X_single)
-        lower, upper = intervals[0]
-        pred_time, confidence, _, _ = predictor.predict(*X_single[0])
+        # Models trained by train.py take the first four features (no startupOverhead)
+        n_feats = getattr(predictor.scaler, 'n_features_in_', getattr(predictor.model, 'n_features_in_', 5))
+        X = np.array([features[:n_feats]], dtype=np.float64)
+        X_scaled = predictor.scaler.transform(X) if predictor.scaler is not None else X
+        lower, upper = cp.predict_interval_array(X_scaled)[0].tolist()
+        pred_time, confidence, _, _ = predictor.predict(*features)
 
         return jsonify({
             'predictedTime': round(pred_time, 2),
@@ -200,7 +248,7 @@ def predict_rl():
     RL_MODEL_PATH = os.path.join(ml_root, 'models', 'ppo_scheduler_final.zip')
 
     try:
-        data = request.get_json(silent=True) or {}
+        data = read_json(silent=True) or {}
         tasks_raw = data.get('tasks', [])
 
         if not tasks_raw or not isinstance(tasks_raw, list):
@@ -8,6 +8,8 @@ from flask import Blueprint, request, jsonify
 import numpy as np
 import logging
 
+from utils.json_provider import read_json
+
 logger = logging.getLogger(__name__)
 
 simulation_bp = Blueprint('simulation', __name__, url_prefix='/api/simulation')
@@ -19,7 +21,7 @@ def predict_exec_time():
     try:
         from services.simulation_models import get_model_manager, extract_features
 
-        data = request.get_json()
+        data = read_json()
         if not data:
             return jsonify({'success': False, 'error': 'Missing request body'}), 400
 
@@ -52,7 +54,7 @@ def predict_queue_wait():
     try:
         from services.simulation_models import get_model_manager, extract_features
 
-        data = request.get_json()
+        data = read_json()
         if not data:
             return jsonify({'success': False, 'error': 'Missing request body'}), 400
 
@@ -81,7 +83,7 @@ def predict_batch():
     try:
         from services.simulation_models import get_model_manager, extract_features
 
-        data = request.get_json()
+        data = read_json()
         if not data or 'items' not in data:
             return jsonify({'success': False, 'error': 'Missing items array'}), 400
 
@@ -124,7 +126,7 @@ def predict_congestion():
     try:
         from services.simulation_models import get_model_manager, extract_features
 
-        data = request.get_json()
+        data = read_json()
         if not data:
             return jsonify({'success': False, 'error': 'Missing request body'}), 400
 
@@ -1,9 +1,12 @@
 import os
 import time
 import numpy as np
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from services.model_manager import model_manager
-from utils.shared import safe_error, record_metric, require_api_key
+from utils.shared import safe_error, record_metric, observe_latency, require_api_key
+from utils.validation import training_arrays
+from utils.json_provider import read_json
+from research import HyperparameterTuner, OPTUNA_AVAILABLE
 
 train_bp = Blueprint('train', __name__)
 
@@ -12,31 +15,16 @@ train_bp = Blueprint('train', __name__)
 def train():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
+        data = read_json()
         
-        if 'data' not in data or len(data['data']) < 10:
+        X, y = training_arrays(data)
+        if len(y) < 10:
             return jsonify({'error': 'At least 10 data points required for training'}), 400
         
-        training_data = data['data']
-        
-        X = []
-        y = []
-        for item in training_data:
-            overhead = item.get('startupOverhead', 1.0)
-            X.append([
-                item['taskSize'],
-                item['taskType'],
-                item['priority'],
-                item['resourceLoad'],
-                overhead
-            ])
-            y.append(item['actualTime'])
-        
-        start = time.time()
-        metrics = predictor.train(np.array(X), np.array(y))
+        start = time.perf_counter()
+        metrics = predictor.train(X, y)
         record_metric('train_requests_total')
-        record_metric('train_latency_sum', time.time() - start)
-        record_metric('train_latency_count')
+        observe_latency('train', time.perf_counter() - start)
         
         return jsonify({
             'success': True,
@@ -45,6 +33,8 @@ def train():
             'modelVersion': predictor.get_version()
         })
         
+    except ValueError as e:
+        return jsonify({'error': safe_error(e)}), 400
     except Exception as e:
         record_metric('errors_total')
         return jsonify({'error': safe_error(e)}), 500
@@ -54,29 +44,18 @@ def train():
 def retrain():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json()
+        data = read_json()
         
-        if 'data' not in data or len(data['data']) < 5:
+        X, y = training_arrays(data)
+        if len(y) < 5:
             return jsonify({'error': 'At least 5 data points required for retraining'}), 400
         
-        training_data = data['data']
         incremental = data.get('incremental', True)
         
-        X = np.array([[
-            item['taskSize'],
-            item['taskType'],
-            item['priority'],
-            item['resourceLoad'],
-            item.get('startupOverhead', 1.0)
-        ] for item in training_data])
-        
-        y = np.array([item['actualTime'] for item in training_data])
-        
-        start = time.time()
+        start = time.perf_counter()
         metrics = predictor.retrain(X, y, incremental=incremental)
         record_metric('train_requests_total')
-        record_metric('train_latency_sum', time.time() - start)
-        record_metric('train_latency_count')
+        observe_latency('train', time.perf_counter() - start)
         
         return jsonify({
             'success': True,
@@ -86,6 +65,8 @@ def retrain():
             'incremental': incremental
         })
         
+    except ValueError as e:
+        return jsonify({'error': safe_error(e)}), 400
     except Exception as e:
         record_metric('errors_total')
         return jsonify({'error': safe_error(e)}), 500
@@ -95,7 +76,7 @@ def retrain():
 def retrain_from_db():
     predictor = model_manager.get_predictor()
     try:
-        data = request.get_json(silent=True) or {}
+        data = read_json(silent=True) or {}
         model_type = data.get('model_type', predictor.model_type)
         min_samples = int(data.get('min_samples', 20))
 
@@ -149,12 +130,11 @@ def retrain_from_db():
         if model_type != predictor.model_type:
             predictor.model_type = model_type
 
-        start = time.time()
+        start = time.perf_counter()
         metrics = predictor.retrain(X, y, incremental=False)
-        train_time = time.time() - start
+        train_time = time.perf_counter() - start
         record_metric('train_requests_total')
-        record_metric('train_latency_sum', train_time)
-        record_metric('train_latency_count')
+        observe_latency('train', train_time)
 
         return jsonify({
             'success': True,
@@ -175,11 +155,10 @@ def retrain_from_db():
 def tune_hyperparameters():
     predictor = model_manager.get_predictor()
     try:
-        from research import HyperparameterTuner, OPTUNA_AVAILABLE as _optuna_ok
-        if not _optuna_ok:
+        if not OPTUNA_AVAILABLE:
             return jsonify({'error': 'Optuna not installed (pip install optuna)'}), 501
 
-        data = request.get_json()
+        data = read_json()
         model_type = data.get('modelType', 'random_forest')
         n_trials = min(int(data.get('nTrials', 50)), 200)
 
@@ -2,7 +2,7 @@ import os
 import threading
 import time
 import logging
-from model import TaskPredictor
+from model import TaskPredictor, XGBOOST_AVAILABLE, check_sklearnex_parity, start_version_scorers
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +23,27 @@ class ModelManager:
                 return
             self.model_path = model_path
             self.model_type = model_type
+            check_sklearnex_parity()
             self.predictor = TaskPredictor(model_path=model_path, model_type=model_type)
+            self._model_pool = None
+            self._pool_lock = threading.Lock()
             self._initialized = True
-            
-            # Start background thread to check for model updates on disk
-            self._stop_event = threading.Event()
-            self._watcher_thread = threading.Thread(target=self._watch_model_updates, daemon=True)
-            self._watcher_thread.start()
+            self.start_watcher()
             logger.info("ModelManager initialized. Background update watcher started.")
 
+    def start_watcher(self):
+        # Start background thread to check for model updates on disk.
+        # Also called from gunicorn's post_fork hook, since threads do not survive fork().
+        self._stop_event = threading.Event()
+        self._watcher_thread = threading.Thread(target=self._watch_model_updates, daemon=True)
+        self._watcher_thread.start()
+
+    def start_version_scorers(self):
+        # Compile/export the active and compare models' per-version scorers in this process.
+        # Called from gunicorn's post_fork hook: with preload_app the models were loaded in the
+        # master, which defers these background threads since they would not survive fork().
+        start_version_scorers([self.predictor, *(self._model_pool or {}).values()])
+
     def _watch_model_updates(self):
         while not self._stop_event.is_set():
             time.sleep(30)
@@ -45,6 +57,40 @@ class ModelManager:
     def get_predictor(self) -> TaskPredictor:
         return self.predictor
 
+    def get_model_pool(self) -> dict:
+        """
+        Resident predictors used by /api/model/compare, one per available model type.
+        Loaded (or trained) once on first use instead of on every compare request.
+        """
+        if self._model_pool is None:
+            with self._pool_lock:
+                if self._model_pool is None:
+                    model_types = ['random_forest', 'gradient_boosting', 'hist_gradient_boosting'] + (
+                        ['xgboost'] if XGBOOST_AVAILABLE else [])
+                    pool = {}
+                    for model_type in model_types:
+                        try:
+                            pool[model_type] = TaskPredictor(
+                                model_path=f'models/compare_{model_type}.joblib',
+                                model_type=model_type,
+                            )
+                        except Exception as e:
+                            logger.error(f"Failed to load {model_type} for comparison: {e}")
+                    self._model_pool = pool
+        return self._model_pool
+
+    def warm_up(self):
+        """
+        Do first-request work ahead of time: load the compare pool, compile the JIT kernels
+        on the single-row and batch paths and precompute the single-prediction lookup table.
+        Called in the gunicorn master before workers fork.
+        """
+        self.get_model_pool()
+        from utils.validation import validate_tasks
+        validate_tasks([{'taskSize': 1, 'taskType': 1, 'priority': 1, 'resourceLoad': 0}])
+        self.predictor.predict(1, 1, 1, 0)
+        self.predictor.build_lookup_table()
+
     def stop_watcher(self):
         self._stop_event.set()
 
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def model_workdir(tmp_path_factory):
+    """
+    Run the suite from a scratch directory: the service resolves models/ (fitted models,
+    calibration residuals, compiled scorers) relative to the working directory, so tests
+    never write artifacts into the tracked ml-service/models/.
+    """
+    workdir = tmp_path_factory.mktemp('ml-service')
+    previous = os.getcwd()
+    os.chdir(workdir)
+    yield workdir
+    os.chdir(previous)
@@ -26,6 +26,33 @@ def api_key_header():
     return {'X-API-Key': 'test-api-key'}
 
 
+@pytest.fixture
+def four_feature_predictor(model_workdir, monkeypatch):
+    """Serve a 4-feature model in the format train.py writes (no startupOverhead column)."""
+    import joblib
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+    from model import TaskPredictor
+    from services.model_manager import model_manager
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(1, 4, 300), rng.integers(1, 4, 300),
+                         rng.integers(1, 6, 300), rng.uniform(0, 100, 300)])
+    y = X[:, 0] * 2 + X[:, 3] * 0.05 + rng.normal(0, 0.3, 300)
+    scaler = StandardScaler().fit(X)
+    model_path = model_workdir / 'models' / 'four_feature.joblib'
+    joblib.dump({
+        'model': RandomForestRegressor(n_estimators=20, random_state=0).fit(scaler.transform(X), y),
+        'scaler': scaler,
+        'calibration_quantile': 0.5,
+        'version': 'v20240101000000_4',
+        'model_type': 'random_forest',
+    }, model_path)
+    predictor = TaskPredictor(model_path=str(model_path))
+    monkeypatch.setattr(model_manager, 'predictor', predictor)
+    return predictor
+
+
 class TestHealthEndpoints:
     def test_health(self, client):
         resp = client.get('/api/health')
@@ -37,6 +64,7 @@ class TestHealthEndpoints:
         resp = client.get('/metrics')
         assert resp.status_code == 200
         assert 'text/plain' in resp.content_type
+        assert 'ml_predict_cache_hits_total' in resp.data.decode()
 
 
 class TestPredictEndpoint:
@@ -75,6 +103,85 @@ class TestPredictEndpoint:
         assert 'predictions' in data
         assert len(data['predictions']) == 3
 
+    def test_batch_predict_reports_invalid_rows(self, client):
+        resp = client.post('/api/predict/batch', json={
+            'tasks': [
+                {'taskSize': 1, 'taskType': 1, 'priority': 1, 'resourceLoad': 10, 'taskId': 'a'},
+                {'taskSize': 4, 'taskType': 1, 'priority': 1, 'resourceLoad': 10},
+                {'taskSize': 2, 'taskType': 2, 'priority': 3},
+                {'taskSize': 'abc', 'taskType': 2, 'priority': 3, 'resourceLoad': 50},
+                {'taskSize': 3, 'taskType': 3, 'priority': 5, 'resourceLoad': 90, 'taskId': 'b'},
+            ]
+        })
+        assert resp.status_code == 200
+        data = json.loads(resp.data)
+        assert [p['taskId'] for p in data['predictions']] == ['a', 'b']
+        assert [e['index'] for e in data['errors']] == [1, 2, 3]
+        assert data['errors'][0]['error'] == 'taskSize must be 1, 2, or 3'
+        assert 'resourceLoad' in data['errors'][1]['error']
+
+    def test_batch_predict_chunked_body(self, client, monkeypatch):
+        from routes import predict as predict_routes
+        monkeypatch.setattr(predict_routes, 'STREAM_CHUNK_SIZE', 2)
+        tasks = [{'taskSize': 1 + i % 3, 'taskType': 1, 'priority': 3, 'resourceLoad': 10 * i, 'taskId': str(i)}
+                 for i in range(5)] + [{'taskSize': 5, 'taskType': 1, 'priority': 3, 'resourceLoad': 10}]
+        data = json.loads(client.post('/api/predict/batch', json={'tasks': tasks}).data)
+        assert [p['taskId'] for p in data['predictions']] == ['0', '1', '2', '3', '4']
+        assert data['totalTasks'] == 5 and data['errorCount'] == 1
+        assert data['predictions'][2]['predictedTime'] > 0
+
+    def test_stream_predict(self, client):
+        lines = [
+            {'taskSize': 1, 'taskType': 1, 'priority': 1, 'resourceLoad': 10, 'taskId': 'a'},
+            {'taskSize': 9, 'taskType': 1, 'priority': 1, 'resourceLoad': 10},
+            {'taskSize': 3, 'taskType': 3, 'priority': 5, 'resourceLoad': 90},
+        ]
+        body = '\n'.join(json.dumps(t) for t in lines) + '\nnot json\n'
+        resp = client.post('/api/predict/stream', data=body, content_type='application/x-ndjson')
+        assert resp.status_code == 200
+        results = [json.loads(line) for line in resp.data.decode().splitlines()]
+        assert [r['index'] for r in results] == [0, 1, 2, 3]
+        assert results[0]['taskId'] == 'a' and results[0]['predictedTime'] > 0
+        assert 'error' in results[1] and 'error' in results[3]
+        assert 'predictedTime' in results[2]
+
+    def test_interval_predict(self, client):
+        resp = client.post('/api/predict/interval', json={
+            'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50, 'alpha': 0.1
+        })
+        assert resp.status_code == 200
+        data = json.loads(resp.data)
+        assert data['lower'] <= data['upper']
+
+    def test_interval_calibration_cached_per_model(self, client):
+        from routes import predict as predict_routes
+        payload = {'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50, 'alpha': 0.2}
+        client.post('/api/predict/interval', json=payload)
+        cp = predict_routes._conformal_cache['by_alpha'][0.2]
+        client.post('/api/predict/interval', json=payload)
+        assert predict_routes._conformal_cache['by_alpha'][0.2] is cp
+
+    def test_interval_predict_without_scaler(self, client, monkeypatch):
+        from services.model_manager import model_manager
+        monkeypatch.setattr(model_manager.get_predictor(), 'scaler', None)
+        resp = client.post('/api/predict/interval', json={
+            'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50, 'alpha': 0.1
+        })
+        assert resp.status_code == 200
+        data = json.loads(resp.data)
+        assert data['lower'] <= data['upper']
+
+    def test_single_task_endpoints_validate_input(self, client):
+        for url in ('/api/predict/interval', '/api/compare', '/api/explain'):
+            resp = client.post(url, json={'taskSize': 7, 'taskType': 1, 'priority': 3, 'resourceLoad': 50})
+            assert resp.status_code in [400, 501], url
+
+    def test_simulation_endpoints_require_body(self, client):
+        for url in ('/api/simulation/predict/exec-time', '/api/simulation/predict/queue-wait',
+                    '/api/simulation/predict/congestion', '/api/simulation/predict/batch'):
+            resp = client.post(url, json={})
+            assert resp.status_code == 400, url
+
     def test_empty_batch(self, client):
         resp = client.post('/api/predict/batch', json={'tasks': []})
         assert resp.status_code in [200, 400]
@@ -87,6 +194,52 @@ class TestModelManagement:
         data = json.loads(resp.data)
         assert 'model_type' in data or 'modelType' in data
 
+    def test_compare_uses_resident_pool(self, client):
+        payload = {'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50}
+        resp = client.post('/api/compare', json=payload)
+        assert resp.status_code == 200
+        data = json.loads(resp.data)
+        assert {'random_forest', 'gradient_boosting'} <= set(data['predictions'])
+        assert all('predictedTime' in p for p in data['predictions'].values())
+
+        from services.model_manager import model_manager
+        pool = model_manager.get_model_pool()
+        client.post('/api/compare', json=payload)
+        assert model_manager.get_model_pool() is pool
+
+    def test_explain_without_scaler(self, client, monkeypatch):
+        pytest.importorskip('shap')
+        from services.model_manager import model_manager
+        # Models saved without a scaler load with scaler=None and take raw features
+        monkeypatch.setattr(model_manager.get_predictor(), 'scaler', None)
+        resp = client.post('/api/explain', json={
+            'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50
+        })
+        assert resp.status_code == 200
+        assert 'shapValues' in json.loads(resp.data)
+
+    def test_explain_four_feature_model(self, client, four_feature_predictor):
+        pytest.importorskip('shap')
+        resp = client.post('/api/explain', json={
+            'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50
+        })
+        assert resp.status_code == 200
+        assert len(json.loads(resp.data)['shapValues']) == 4
+
+    def test_interval_predict_four_feature_model(self, client, four_feature_predictor):
+        resp = client.post('/api/predict/interval', json={
+            'taskSize': 2, 'taskType': 1, 'priority': 3, 'resourceLoad': 50, 'alpha': 0.1
+        })
+        assert resp.status_code == 200
+        data = json.loads(resp.data)
+        assert data['lower'] <= data['upper']
+
+    def test_model_info_follows_switch(self, client, api_key_header):
+        client.post('/api/model/switch', json={'modelType': 'gradient_boosting'}, headers=api_key_header)
+        assert json.loads(client.get('/api/model/info').data)['modelType'] == 'gradient_boosting'
+        client.post('/api/model/switch', json={'modelType': 'random_forest'}, headers=api_key_header)
+        assert json.loads(client.get('/api/model/info').data)['modelType'] == 'random_forest'
+
     def test_model_switch_requires_auth(self, client):
         resp = client.post('/api/model/switch', json={'modelType': 'xgboost'})
         assert resp.status_code in [401, 403]
@@ -102,6 +255,26 @@ class TestModelManagement:
         assert resp.status_code in [401, 403]
 
 
+class TestTrainingPayload:
+    def test_row_and_column_formats_match(self):
+        from utils.validation import training_arrays
+        rows = [{'taskSize': 1, 'taskType': 2, 'priority': 3, 'resourceLoad': 40, 'actualTime': 5.5},
+                {'taskSize': 3, 'taskType': 1, 'priority': 5, 'resourceLoad': 90, 'startupOverhead': 2.0,
+                 'actualTime': 12.0}]
+        X_rows, y_rows = training_arrays({'data': rows})
+        X_cols, y_cols = training_arrays({'X': [[1, 2, 3, 40], [3, 1, 5, 90]], 'y': [5.5, 12.0]})
+        assert X_rows.dtype == y_rows.dtype == 'float32'
+        assert X_rows.shape == X_cols.shape == (2, 5)
+        assert X_rows[0].tolist() == X_cols[0].tolist()
+        assert X_rows[1, 4] == 2.0 and X_cols[1, 4] == 1.0
+        assert y_rows.tolist() == y_cols.tolist()
+
+    def test_column_format_length_mismatch(self, client, api_key_header):
+        resp = client.post('/api/retrain', json={'X': [[1, 1, 1, 10]] * 6, 'y': [1.0] * 5},
+                           headers=api_key_header)
+        assert resp.status_code == 400
+
+
 class TestRateLimiting:
     def test_rate_limit_headers(self, client):
         """After multiple rapid requests, rate limiting should kick in."""
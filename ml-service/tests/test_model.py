@@ -15,9 +15,10 @@ from model import TaskPredictor
 
 
 @pytest.fixture
-def predictor():
-    """Create a fresh predictor for each test."""
-    return TaskPredictor(model_path='models/test_predictor.joblib', model_type='random_forest')
+def predictor(model_workdir):
+    """Create a fresh predictor for each test (model saved under the scratch directory)."""
+    return TaskPredictor(model_path=str(model_workdir / 'models' / 'test_predictor.joblib'),
+                         model_type='random_forest')
 
 
 class TestSinglePrediction:
@@ -70,6 +71,72 @@ class TestSinglePrediction:
                     assert not np.isnan(time), f"NaN time for ({size},{ttype},{pri})"
                     assert not np.isnan(conf), f"NaN confidence for ({size},{ttype},{pri})"
 
+    def test_native_scorer_matches_model(self, predictor):
+        """Treelite single-row scoring must agree with the sklearn model."""
+        if predictor._native_model is None:
+            pytest.skip("treelite not installed")
+        X_scaled = predictor.scaler.transform(np.array([[2, 1, 3, 50, 1.0]]))
+        assert predictor._score_row(X_scaled) == pytest.approx(float(predictor.model.predict(X_scaled)[0]), abs=1e-4)
+
+    def test_packed_forest_matches_model(self, predictor):
+        """The Numba tree walker must agree with sklearn for forests and boosting."""
+        from model import _pack_forest, _forest_score_row
+        X_scaled = predictor.scaler.transform(predictor._generate_synthetic_data(50)[0])
+        for model_type in ('random_forest', 'gradient_boosting'):
+            predictor.switch_model(model_type)
+            packed = _pack_forest(predictor.model)
+            expected = predictor.model.predict(X_scaled)
+            actual = [_forest_score_row(row, *packed) for row in X_scaled.astype(np.float32)]
+            np.testing.assert_allclose(actual, expected, atol=1e-9)
+
+    def test_compiled_scorer_matches_model(self, predictor):
+        """tl2cgen-compiled scoring must agree with the sklearn model (small forest to keep compile fast)."""
+        import model
+        from sklearn.ensemble import RandomForestRegressor
+        if not model.TL2CGEN_AVAILABLE or predictor._native_model is None:
+            pytest.skip("treelite/tl2cgen not installed")
+        X, y = predictor._generate_synthetic_data(300)
+        predictor.model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(
+            predictor.scaler.transform(X), y)
+        predictor._on_model_updated()
+        libpath = predictor._compiled_lib_path(predictor.version)
+        try:
+            predictor._compile_native_lib(predictor._native_model, predictor.version, libpath)
+            assert predictor._compiled_model is not None
+            X_scaled = predictor.scaler.transform(np.array([[2, 1, 3, 50, 1.0]]))
+            assert predictor._score_row(X_scaled) == pytest.approx(float(predictor.model.predict(X_scaled)[0]), abs=1e-4)
+        finally:
+            if os.path.exists(libpath):
+                os.remove(libpath)
+
+    def test_onnx_scorer_matches_model(self, predictor):
+        """ONNX Runtime scoring (single row and batch) must agree with the sklearn model."""
+        import model
+        from sklearn.ensemble import RandomForestRegressor
+        if not model.ONNX_AVAILABLE:
+            pytest.skip("onnxruntime/skl2onnx not installed")
+        X, y = predictor._generate_synthetic_data(300)
+        X_scaled = predictor.scaler.transform(X)
+        predictor.model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(X_scaled, y)
+        predictor._on_model_updated()
+        onnx_path = predictor._onnx_path(predictor.version)
+        try:
+            predictor._export_onnx(predictor.model, predictor.version, onnx_path)
+            assert predictor._onnx_session is not None
+            np.testing.assert_allclose(predictor._score_rows(X_scaled[:50]), predictor.model.predict(X_scaled[:50]),
+                                       atol=1e-4)
+            assert predictor._score_row(X_scaled[:1]) == pytest.approx(float(predictor.model.predict(X_scaled[:1])[0]),
+                                                                       abs=1e-4)
+        finally:
+            if os.path.exists(onnx_path):
+                os.remove(onnx_path)
+
+    def test_predict_row_matches_predict(self, predictor):
+        """predict() fills a reused per-thread buffer; predict_row on an explicit row must agree."""
+        row = np.array([[3, 2, 4, 90, 2.0]], dtype=np.float32)
+        assert predictor.predict_row(row) == pytest.approx(predictor.predict(3, 2, 4, 90, 2.0))
+        assert predictor.predict(1, 1, 1, 10, 0.5) != predictor.predict(3, 2, 4, 90, 2.0)
+
     def test_deterministic(self, predictor):
         """Same inputs must produce same outputs."""
         res1 = predictor.predict(2, 2, 3, 50, 1.0)
@@ -80,6 +147,149 @@ class TestSinglePrediction:
         assert c1 == pytest.approx(c2)
 
 
+class TestPredictionCache:
+    """Tests for the predict_cached() LRU cache."""
+
+    def test_cached_matches_predict_on_integer_load(self, predictor):
+        assert predictor.predict_cached(2, 1, 3, 50, 1.0) == pytest.approx(predictor.predict(2, 1, 3, 50, 1.0))
+
+    def test_load_is_quantized(self, predictor):
+        predictor.predict_cached(2, 1, 3, 50.2, 1.0)
+        predictor.predict_cached(2, 1, 3, 49.8, 1.0)
+        info = predictor.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+
+    def test_cache_cleared_on_train(self, predictor):
+        predictor.predict_cached(1, 1, 1, 10, 1.0)
+        X, y = predictor._generate_synthetic_data(100)
+        predictor.train(X, y)
+        assert predictor.cache_info().currsize == 0
+
+    def test_lookup_table_matches_predict(self, predictor):
+        predictor.build_lookup_table()
+        for args in [(1, 1, 1, 0), (2, 3, 4, 57), (3, 2, 5, 100)]:
+            assert predictor.predict_cached(*args) == pytest.approx(predictor.predict(*args), abs=1e-4)
+        assert predictor.cache_info().currsize == 0
+        # Inputs outside the table fall back to the LRU cache
+        predictor.predict_cached(2, 1, 3, 50, 2.5)
+        assert predictor.cache_info().currsize == 1
+
+    def test_lookup_table_rebuilt_after_train(self, predictor):
+        predictor.build_lookup_table()
+        X, y = predictor._generate_synthetic_data(100)
+        predictor.train(X, y)
+        assert predictor._lookup_table is None
+        assert predictor.predict_cached(2, 1, 3, 50) == pytest.approx(predictor.predict(2, 1, 3, 50), abs=1e-4)
+        assert predictor._lookup_table is not None
+
+    def test_batch_duplicates_match_unique(self, predictor):
+        features = [[2, 1, 3, 50, 1.0], [3, 3, 5, 90, 2.0], [2, 1, 3, 50, 1.0]]
+        times, _, _, _ = predictor.predict_many(features)
+        assert times[0] == times[2]
+        assert times[1] == pytest.approx(predictor.predict_many(features[1:2])[0][0])
+
+
+class TestCalibration:
+    """Tests for the persisted conformal calibration residuals."""
+
+    def test_residuals_persisted_per_version(self, predictor):
+        path = predictor._calibration_path(predictor.version)
+        if os.path.exists(path):
+            os.remove(path)
+        residuals = predictor.calibration_residuals()
+        assert os.path.exists(path)
+        reloaded = predictor.calibration_residuals()
+        assert isinstance(reloaded, np.memmap)
+        np.testing.assert_allclose(reloaded, residuals)
+
+    def test_residuals_saved_through_own_scratch_file(self, predictor, monkeypatch):
+        """Workers saving the same version's residuals must not np.save into a shared .tmp file."""
+        path = predictor._calibration_path(predictor.version)
+        sources = []
+        replace = os.replace
+        monkeypatch.setattr(os, 'replace', lambda src, dst: (sources.append(src), replace(src, dst))[1])
+        for _ in range(2):
+            if os.path.exists(path):
+                os.remove(path)
+            predictor.calibration_residuals()
+        assert len(set(sources)) == 2
+        assert all(src.endswith('.tmp.npy') for src in sources)
+
+
+class TestVersionScorers:
+    """Tests for the per-version compiled/ONNX scorers and their artifacts."""
+
+    def test_native_compile_deferred_until_post_fork(self, model_workdir, monkeypatch):
+        """A preloaded gunicorn master must not start the compile thread; workers start it after fork."""
+        import model
+        scheduled = []
+        monkeypatch.setattr(model, '_defer_version_scorers', True)
+        monkeypatch.setattr(TaskPredictor, '_schedule_native_compile', lambda self: scheduled.append(self.version))
+        predictor = TaskPredictor(model_path=str(model_workdir / 'models' / 'deferred.joblib'))
+        assert scheduled == []
+        model.start_version_scorers([predictor])
+        assert scheduled == [predictor.version]
+        predictor.train(*predictor._generate_synthetic_data(200))
+        assert scheduled[-1] == predictor.version
+
+    def test_onnx_export_deferred_until_post_fork(self, model_workdir, monkeypatch):
+        """Likewise the ONNX export thread for INFERENCE_BACKEND=onnx."""
+        import model
+        scheduled = []
+        monkeypatch.setattr(model, '_defer_version_scorers', True)
+        monkeypatch.setattr(TaskPredictor, '_schedule_onnx_export', lambda self: scheduled.append(self.version))
+        predictor = TaskPredictor(model_path=str(model_workdir / 'models' / 'deferred_onnx.joblib'))
+        assert scheduled == []
+        model.start_version_scorers([predictor])
+        assert scheduled == [predictor.version]
+
+    def test_tmp_artifact_paths_unique(self, predictor):
+        """Workers building the same version must not write to the same scratch file."""
+        libpath = predictor._compiled_lib_path(predictor.version)
+        first, second = predictor._tmp_artifact_path(libpath), predictor._tmp_artifact_path(libpath)
+        assert first != second
+        assert f".{os.getpid()}." in first and first.endswith('.tmp.so')
+
+    def test_onnx_exports_use_own_scratch_file(self, predictor, monkeypatch):
+        """Two exports of the same version (as from two workers) must not share a .tmp file."""
+        import model
+        if not model.ONNX_AVAILABLE:
+            pytest.skip("onnxruntime/skl2onnx not installed")
+        from sklearn.ensemble import RandomForestRegressor
+        X, y = predictor._generate_synthetic_data(300)
+        predictor.model = RandomForestRegressor(n_estimators=5, max_depth=4, random_state=0).fit(
+            predictor.scaler.transform(X), y)
+        onnx_path = predictor._onnx_path(predictor.version)
+        sources = []
+        replace = os.replace
+        monkeypatch.setattr(os, 'replace', lambda src, dst: (sources.append(src), replace(src, dst))[1])
+        try:
+            for _ in range(2):
+                predictor._export_onnx(predictor.model, predictor.version, onnx_path)
+            assert len(set(sources)) == 2
+            assert predictor._onnx_session is not None
+        finally:
+            if os.path.exists(onnx_path):
+                os.remove(onnx_path)
+
+    def test_stale_cleanup_keeps_in_progress_builds(self, predictor):
+        """Another worker's half-written .tmp library is not a stale artifact."""
+        base = os.path.splitext(predictor.model_path)[0]
+        keep, stale = f"{base}_v2.so", f"{base}_v1.so"
+        in_progress = predictor._tmp_artifact_path(f"{base}_v3.so")
+        try:
+            for path in (keep, stale, in_progress):
+                open(path, 'wb').close()
+            predictor._remove_stale_artifacts('.so', keep)
+            assert os.path.exists(keep) and os.path.exists(in_progress)
+            assert not os.path.exists(stale)
+        finally:
+            for path in (keep, stale, in_progress):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
 class TestBatchPrediction:
     """Tests for the predict_batch() method."""
 
@@ -95,9 +305,9 @@ class TestBatchPrediction:
         single_time, single_conf = res_single[0], res_single[1]
         batch_results = predictor.predict_batch([features])
         batch_time, batch_conf = batch_results[0][0], batch_results[0][1]
-        # Allow small floating point difference due to numpy vs python
-        assert abs(single_time - batch_time) < 0.5, \
-            f"Single({single_time}) vs Batch({batch_time}) differ too much"
+        # Both paths feed float32 rows to the scorer, so results should agree closely
+        assert abs(single_time - batch_time) < 1e-4, \
+            f"Single({single_time}) vs Batch({batch_time}) differ"
 
     def test_batch_positive_times(self, predictor):
         features = [[s, t, p, l, 1.0] for s in [1,2,3] for t in [1,2,3] for p in [1,3,5] for l in [10,50,90]]
@@ -113,6 +323,23 @@ class TestBatchPrediction:
             conf = item[1]
             assert 0.1 <= conf <= 1.0, f"Batch item {i} confidence {conf} out of range"
 
+    def test_predict_many_matches_batch(self, predictor):
+        features = [[1, 1, 3, 50, 1.0], [2, 2, 4, 70, 1.5], [3, 3, 5, 90, 2.0]]
+        times, confs, lower, upper = predictor.predict_many(np.array(features, dtype=np.float32))
+        assert times.shape == confs.shape == lower.shape == upper.shape == (3,)
+        for i, (t, c, lo, hi) in enumerate(predictor.predict_batch(features)):
+            assert times[i] == pytest.approx(t)
+            assert confs[i] == pytest.approx(c)
+            assert lower[i] <= times[i] <= upper[i]
+
+    def test_guard_kernel_matches_numpy(self, predictor):
+        from model import _guard_predictions
+        rng = np.random.RandomState(0)
+        args = (rng.rand(50) * 10, rng.randint(1, 4, 50).astype(float), rng.rand(50) * 100, rng.rand(50) * 2, 0.5)
+        py_func = getattr(_guard_predictions, 'py_func', _guard_predictions)
+        for jit_out, ref_out in zip(_guard_predictions(*args), py_func(*args)):
+            np.testing.assert_allclose(jit_out, ref_out)
+
     def test_batch_empty_raises(self, predictor):
         """Empty batch should raise ValueError (numpy can't create array)."""
         with pytest.raises((ValueError, IndexError)):
@@ -130,6 +357,15 @@ class TestModelLifecycle:
         assert version != "not-loaded"
         assert version.startswith("v")
 
+    def test_versions_unique_within_a_second(self, predictor):
+        """Back-to-back trainings must not reuse each other's per-version artifacts."""
+        X, y = predictor._generate_synthetic_data(200)
+        predictor.train(X, y)
+        first = predictor.get_version()
+        predictor.train(X, y)
+        assert predictor.get_version() != first
+        assert predictor._calibration_path(predictor.get_version()) != predictor._calibration_path(first)
+
     def test_train_returns_metrics(self, predictor):
         X, y = predictor._generate_synthetic_data(100)
         metrics = predictor.train(X, y)
@@ -137,6 +373,38 @@ class TestModelLifecycle:
         assert 'model_type' in metrics
         assert metrics['r2_score'] > 0
 
+    def test_random_forest_scored_out_of_bag(self, predictor):
+        predictor.switch_model('random_forest')
+        X, y = predictor._generate_synthetic_data(200)
+        metrics = predictor.train(X, y)
+        assert metrics['r2_score'] == round(predictor.model.oob_score_, 4)
+        assert metrics['r2_std'] == 0.0
+
+    def test_incremental_retrain_appends(self, predictor):
+        X, y = predictor._generate_synthetic_data(300)
+        predictor.retrain(X[:100], y[:100])
+        buffer = predictor._training_X
+        predictor.retrain(X[100:], y[100:], incremental=True)
+        assert predictor._n_training_rows == 300
+        assert predictor._training_X is buffer  # appended in place, no reallocation
+        np.testing.assert_array_equal(predictor._training_X[:300], X)
+        np.testing.assert_array_equal(predictor._training_y[:300], y.astype(np.float32))
+        predictor.retrain(X[:50], y[:50])
+        assert predictor._n_training_rows == 50
+
+    def test_hist_gradient_boosting_survives_retrain(self, predictor):
+        predictor.switch_model('hist_gradient_boosting')
+        X, y = predictor._generate_synthetic_data(200)
+        metrics = predictor.retrain(X, y)
+        assert metrics['model_type'] == predictor.model_type == 'hist_gradient_boosting'
+        assert type(predictor.model).__name__ == 'HistGradientBoostingRegressor'
+        assert TaskPredictor(model_path=predictor.model_path).model_type == 'hist_gradient_boosting'
+
+    def test_predict_single_threaded_after_train(self, predictor):
+        predictor.switch_model('random_forest')
+        assert predictor.model.get_params()['n_jobs'] == 1
+        assert TaskPredictor(model_path=predictor.model_path).model.get_params()['n_jobs'] == 1
+
     def test_switch_model(self, predictor):
         result = predictor.switch_model('gradient_boosting')
         assert result['model_type'] == 'gradient_boosting'
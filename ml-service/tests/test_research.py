@@ -0,0 +1,240 @@
+"""
+Research Module Tests
+Checks the research.py extensions against the straightforward formulas they replaced.
+"""
+
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import research
+
+from sklearn.linear_model import LinearRegression
+
+
+@pytest.fixture
+def regression_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 4))
+    y = X @ np.array([1.5, -2.0, 0.5, 3.0]) + rng.normal(0, 0.5, 120)
+    return X, y
+
+
+class TestPPOTaskSampling:
+    def _rollout(self, env, actions):
+        obs = [env.reset()]
+        rewards = []
+        for action in actions:
+            o, reward, done, _ = env.step(action)
+            obs.append(o)
+            rewards.append(reward)
+        return np.array(obs), np.array(rewards)
+
+    def test_seeded_episodes_are_reproducible(self):
+        actions = [i % 4 for i in range(20)]
+        obs_a, rewards_a = self._rollout(research.PPOSchedulerEnv(max_steps=20, seed=3), actions)
+        obs_b, rewards_b = self._rollout(research.PPOSchedulerEnv(max_steps=20, seed=3), actions)
+        np.testing.assert_array_equal(obs_a, obs_b)
+        np.testing.assert_array_equal(rewards_a, rewards_b)
+
+    def test_tasks_cover_the_old_ranges(self):
+        env = research.PPOSchedulerEnv(max_steps=500, seed=0)
+        env.reset()
+        pool = env._task_pool
+        # Same supports as np.random.choice([1,2,3]) / ([1,2,3]) / ([1..5]) with a 0 placeholder
+        assert set(np.unique(pool[:, 0])) == {1, 2, 3}
+        assert set(np.unique(pool[:, 1])) == {1, 2, 3}
+        assert set(np.unique(pool[:, 2])) == {1, 2, 3, 4, 5}
+        assert not pool[:, 3].any()
+        assert env._noise.shape == (500,)
+
+    def test_each_step_uses_the_next_pooled_task(self):
+        env = research.PPOSchedulerEnv(max_steps=10, seed=1)
+        env.reset()
+        for step in range(9):
+            np.testing.assert_array_equal(env._current_task, env._task_pool[step])
+            env.step(0)
+
+    def test_step_after_episode_end_asks_for_reset(self):
+        env = research.PPOSchedulerEnv(max_steps=3, seed=5)
+        with pytest.raises(ValueError, match="reset"):
+            env.step(0)
+        env.reset()
+        done = False
+        while not done:
+            _, _, done, _ = env.step(0)
+        with pytest.raises(ValueError, match="reset"):
+            env.step(0)
+        env.reset()
+        env.step(0)
+
+    def test_current_task_survives_reset(self):
+        env = research.PPOSchedulerEnv(max_steps=10, seed=2)
+        env.reset()
+        task = env._current_task
+        before = task.copy()
+        env.reset()
+        # reset() re-samples the pool in place; tasks already handed out must not change
+        np.testing.assert_array_equal(task, before)
+
+
+def _reference_step(task_size, resource_loads, action, noise):
+    """The NumPy step that _ppo_step_kernel replaced."""
+    load = resource_loads[action]
+    exec_time = max(0.5, task_size * 2 * (1 + load / 100) + noise)
+    resource_loads[action] = min(100, load + 15)
+    reward = -exec_time - 0.01 * np.var(resource_loads)
+    return exec_time, reward
+
+
+class TestPPOStepKernel:
+    def test_matches_numpy_step(self):
+        rng = np.random.default_rng(0)
+        loads = np.zeros(4)
+        expected_loads = loads.copy()
+        for _ in range(200):
+            task_size = float(rng.integers(1, 4))
+            action = int(rng.integers(0, 4))
+            noise = rng.normal(0, 0.3)
+            exec_time, reward = research._ppo_step_kernel(task_size, loads, action, noise)
+            expected = _reference_step(task_size, expected_loads, action, noise)
+            assert exec_time == pytest.approx(expected[0], rel=1e-12)
+            assert reward == pytest.approx(expected[1], rel=1e-12)
+            np.testing.assert_array_equal(loads, expected_loads)
+            if rng.random() < 0.1:
+                loads[:] = 0
+                expected_loads[:] = 0
+
+    def test_clamps_exec_time_and_load(self):
+        loads = np.array([95.0, 0.0])
+        exec_time, _ = research._ppo_step_kernel(1.0, loads, 0, -10.0)
+        assert exec_time == 0.5
+        assert loads[0] == 100.0
+
+    def test_env_step_matches_numpy_step(self):
+        env = research.PPOSchedulerEnv(max_steps=50, seed=4)
+        env.reset()
+        expected_loads = np.zeros(env.n_resources)
+        for step in range(50):
+            action = step % env.n_resources
+            expected = _reference_step(float(env._current_task[0]), expected_loads, action, env._noise[step])
+            _, reward, _, info = env.step(action)
+            assert info['exec_time'] == pytest.approx(expected[0], rel=1e-12)
+            assert reward == pytest.approx(expected[1], rel=1e-12)
+            np.testing.assert_array_equal(info['resource_loads'], expected_loads)
+
+
+class TestConformalPredictor:
+    @pytest.fixture
+    def predictor(self, regression_data):
+        X, y = regression_data
+        cp = research.ConformalPredictor(LinearRegression().fit(X[:60], y[:60]), alpha=0.1)
+        cp.calibrate(X[60:90], y[60:90])
+        return cp
+
+    def test_predict_interval_matches_list_comprehension(self, predictor, regression_data):
+        X, _ = regression_data
+        q = predictor.get_width()
+        expected = [(float(p - q), float(p + q)) for p in predictor.model.predict(X[90:])]
+        assert predictor.predict_interval(X[90:]) == expected
+
+    def test_interval_array_rows_match_tuples(self, predictor, regression_data):
+        X, _ = regression_data
+        intervals = predictor.predict_interval_array(X[90:])
+        assert intervals.shape == (30, 2)
+        assert [tuple(row) for row in intervals.tolist()] == predictor.predict_interval(X[90:])
+
+    def test_requires_calibration(self, regression_data):
+        X, y = regression_data
+        cp = research.ConformalPredictor(LinearRegression().fit(X, y))
+        with pytest.raises(ValueError):
+            cp.predict_interval(X)
+
+
+class RecordingTrial:
+    """Stands in for an optuna.Trial; prunes once `prune_at` fold reports have been made."""
+
+    def __init__(self, prune_at=None):
+        self.prune_at = prune_at
+        self.reports = []
+
+    def report(self, value, step):
+        self.reports.append((step, value))
+
+    def should_prune(self):
+        return self.prune_at is not None and len(self.reports) >= self.prune_at
+
+
+class TestTunerCVScore:
+    @pytest.fixture
+    def tuner(self, regression_data):
+        pytest.importorskip("optuna")
+        X, y = regression_data
+        return research.HyperparameterTuner(X, y, n_folds=4)
+
+    def test_matches_cross_val_score(self, tuner):
+        from sklearn.model_selection import cross_val_score
+        expected = np.mean(cross_val_score(LinearRegression(), tuner.X, tuner.y, cv=tuner.n_folds, scoring='r2'))
+        assert tuner._cv_score(RecordingTrial(), LinearRegression()) == pytest.approx(expected, rel=1e-12)
+
+    def test_reports_running_mean_per_fold(self, tuner):
+        from sklearn.model_selection import cross_val_score
+        trial = RecordingTrial()
+        tuner._cv_score(trial, LinearRegression())
+        fold_scores = cross_val_score(LinearRegression(), tuner.X, tuner.y, cv=tuner.n_folds, scoring='r2')
+        assert [step for step, _ in trial.reports] == list(range(tuner.n_folds))
+        running = np.cumsum(fold_scores) / np.arange(1, tuner.n_folds + 1)
+        np.testing.assert_allclose([value for _, value in trial.reports], running, rtol=1e-12)
+
+    def test_prunes_after_reported_fold(self, tuner):
+        import optuna
+        trial = RecordingTrial(prune_at=2)
+        with pytest.raises(optuna.TrialPruned):
+            tuner._cv_score(trial, LinearRegression())
+        assert len(trial.reports) == 2
+
+
+def _reference_significance(model_a, model_b, X, y, n_folds, seed):
+    """The sequential per-fold loop that compare_models_significance replaced."""
+    from scipy import stats
+    from sklearn.base import clone
+    from sklearn.metrics import r2_score
+    from sklearn.model_selection import KFold
+    model_a, model_b = clone(model_a), clone(model_b)
+    scores_a, scores_b = [], []
+    for train_idx, val_idx in KFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X):
+        model_a.fit(X[train_idx], y[train_idx])
+        scores_a.append(r2_score(y[val_idx], model_a.predict(X[val_idx])))
+        model_b.fit(X[train_idx], y[train_idx])
+        scores_b.append(r2_score(y[val_idx], model_b.predict(X[val_idx])))
+    t_stat, p_value = stats.ttest_rel(scores_a, scores_b)
+    return {
+        'model_a_mean_r2': round(float(np.mean(scores_a)), 4),
+        'model_b_mean_r2': round(float(np.mean(scores_b)), 4),
+        't_statistic': round(float(t_stat), 4),
+        'p_value': round(float(p_value), 6),
+        'significant': p_value < 0.05,
+        'folds': n_folds,
+    }
+
+
+class TestCompareModelsSignificance:
+    def test_matches_sequential_loop(self, regression_data):
+        from sklearn.ensemble import RandomForestRegressor
+        X, y = regression_data
+        model_a = LinearRegression()
+        model_b = RandomForestRegressor(n_estimators=20, random_state=0, n_jobs=-1)
+        result = research.compare_models_significance(model_a, model_b, X, y, n_folds=4, seed=3)
+        assert result == _reference_significance(model_a, model_b, X, y, n_folds=4, seed=3)
+
+    def test_leaves_caller_models_unfitted(self, regression_data):
+        from sklearn.ensemble import RandomForestRegressor
+        X, y = regression_data
+        model_a = LinearRegression()
+        model_b = RandomForestRegressor(n_estimators=10, random_state=0, n_jobs=-1)
+        research.compare_models_significance(model_a, model_b, X, y, n_folds=3)
+        assert not hasattr(model_a, 'coef_')
+        assert not hasattr(model_b, 'estimators_')
+        assert model_b.n_jobs == -1
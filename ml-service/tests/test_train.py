@@ -0,0 +1,274 @@
+"""
+Training Pipeline Tests
+Tests the train.py helpers: data fingerprinting, fold assignment, dtype handling and metrics.
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import train
+
+
+@pytest.fixture
+def frame():
+    return train.generate_synthetic(200, seed=7)
+
+
+class TestDataFingerprint:
+    def test_row_order_does_not_matter(self, frame):
+        shuffled = frame.sample(frac=1, random_state=1)
+        assert train.data_fingerprint(frame) == train.data_fingerprint(shuffled)
+
+    def test_ignores_extra_and_object_columns(self, frame):
+        extra = frame.assign(note=['free text'] * len(frame), rowId=np.arange(len(frame)))
+        assert train.data_fingerprint(extra) == train.data_fingerprint(frame)
+
+    def test_changes_with_the_data(self, frame):
+        changed = frame.copy()
+        changed.loc[0, 'actualTime'] += 1
+        assert train.data_fingerprint(changed) != train.data_fingerprint(frame)
+
+
+class TestFoldCache:
+    def test_key_covers_hyperparameters_and_versions(self, tmp_path, frame):
+        from joblib import Memory
+        fit_fold = Memory(str(tmp_path), verbose=0).cache(train._fit_fold, ignore=['n_jobs'])
+        X = frame[train.FEATURE_NAMES].to_numpy(dtype=np.float32)
+        y = frame['actualTime'].to_numpy(dtype=np.float32)
+        fold_ids = train._fold_ids(len(X), 3, seed=0)
+        params = train.build_model('random_forest', 0).get_params()
+        params.pop('n_jobs')
+        params.update(n_estimators=5, oob_score=False)
+        versions = train._library_versions()
+
+        fit_fold(1, X, y, fold_ids, 'random_forest', params, versions, 1)
+        assert fit_fold.check_call_in_cache(1, X, y, fold_ids, 'random_forest', params, versions, 4)
+        assert not fit_fold.check_call_in_cache(1, X, y, fold_ids, 'random_forest',
+                                                {**params, 'max_depth': 3}, versions, 1)
+        assert not fit_fold.check_call_in_cache(1, X, y, fold_ids, 'random_forest',
+                                                params, {**versions, 'sklearn': '0.0'}, 1)
+
+
+class TestPostgresSource:
+    @pytest.fixture(autouse=True)
+    def database_url(self, monkeypatch):
+        monkeypatch.setenv('DATABASE_URL', 'postgresql://localhost/test')
+
+    def test_reports_adbc_reader(self, monkeypatch, frame):
+        monkeypatch.setattr(train, 'ADBC_AVAILABLE', True)
+        monkeypatch.setattr(train, '_read_postgres_arrow', lambda url, query: frame)
+        df, source = train.load_from_postgres()
+        assert source == 'postgresql-adbc' and len(df) == len(frame)
+
+    def test_reports_copy_fallback(self, monkeypatch, frame):
+        def broken(url, query):
+            raise RuntimeError('adbc down')
+        monkeypatch.setattr(train, 'ADBC_AVAILABLE', True)
+        monkeypatch.setattr(train, 'POSTGRES_AVAILABLE', True)
+        monkeypatch.setattr(train, '_read_postgres_arrow', broken)
+        monkeypatch.setattr(train, '_read_postgres_copy', lambda url, query: frame)
+        assert train.load_from_postgres()[1] == 'postgresql-copy'
+
+    def test_no_source_when_read_fails(self, monkeypatch):
+        def broken(url, query):
+            raise RuntimeError('db down')
+        monkeypatch.setattr(train, 'ADBC_AVAILABLE', False)
+        monkeypatch.setattr(train, 'POSTGRES_AVAILABLE', True)
+        monkeypatch.setattr(train, '_read_postgres_copy', broken)
+        assert train.load_from_postgres() == (None, None)
+
+
+class FakeAdbcConnection:
+    """Stands in for adbc_driver_postgresql.dbapi: serves canned Arrow batches."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        self.queries.append(query)
+
+    def fetch_record_batch(self):
+        return iter(self.batches)
+
+
+class TestArrowReader:
+    @pytest.fixture
+    def pa(self):
+        return pytest.importorskip('pyarrow')
+
+    def _batch(self, pa, sizes, types, priorities, loads, times):
+        # Wire types as Postgres returns them: int4 codes, smallint priority, float8 values
+        return pa.record_batch([
+            pa.array(sizes, pa.int32()), pa.array(types, pa.int32()), pa.array(priorities, pa.int16()),
+            pa.array(loads, pa.float64()), pa.array(times, pa.float64()),
+            pa.array(['x'] * len(sizes)),
+        ], names=['taskSize', 'taskType', 'priority', 'resourceLoad', 'actualTime', 'extra'])
+
+    def test_batches_are_narrowed_and_concatenated(self, pa, monkeypatch):
+        conn = FakeAdbcConnection([
+            self._batch(pa, [1, 2], [3, 1], [5, 1], [12.5, 87.25], [1.5, 2.5]),
+            self._batch(pa, [3], [2], [3], [50.0], [9.75]),
+        ])
+        monkeypatch.setattr(train, 'adbc_postgres', type('adbc', (), {'connect': staticmethod(lambda url: conn)}),
+                            raising=False)
+        df = train._read_postgres_arrow('postgresql://test', train.TRAINING_QUERY)
+        assert conn.queries == [train.TRAINING_QUERY]
+        assert list(df.columns) == list(train.COLUMN_DTYPES)
+        assert {c: str(t) for c, t in df.dtypes.items()} == train.COLUMN_DTYPES
+        assert df['taskSize'].tolist() == [1, 2, 3] and df['taskType'].tolist() == [3, 1, 2]
+        assert df['priority'].tolist() == [5, 1, 3]
+        assert df['resourceLoad'].tolist() == [12.5, 87.25, 50.0]
+        assert df['actualTime'].tolist() == [1.5, 2.5, 9.75]
+
+    def test_empty_result_keeps_schema(self, pa, monkeypatch):
+        conn = FakeAdbcConnection([])
+        monkeypatch.setattr(train, 'adbc_postgres', type('adbc', (), {'connect': staticmethod(lambda url: conn)}),
+                            raising=False)
+        df = train._read_postgres_arrow('postgresql://test', train.TRAINING_QUERY)
+        assert len(df) == 0
+        assert {c: str(t) for c, t in df.dtypes.items()} == train.COLUMN_DTYPES
+
+
+class TestTrainingQuery:
+    def test_enum_codes_match_the_maps(self):
+        for name, code in {**train.SIZE_MAP, **train.TYPE_MAP}.items():
+            assert f"('{name}', {code})" in train.TRAINING_QUERY
+
+
+LIVE_DB_URL = os.getenv('TEST_DATABASE_URL')
+LIVE_SCHEMA = 'train_py_test'
+LIVE_SETUP = f"""
+DROP SCHEMA IF EXISTS {LIVE_SCHEMA} CASCADE;
+CREATE SCHEMA {LIVE_SCHEMA};
+SET search_path TO {LIVE_SCHEMA};
+CREATE TYPE "TaskType" AS ENUM ('CPU', 'IO', 'MIXED');
+CREATE TYPE "TaskSize" AS ENUM ('SMALL', 'MEDIUM', 'LARGE');
+CREATE TABLE "Resource" (id text PRIMARY KEY, "currentLoad" double precision NOT NULL DEFAULT 0);
+CREATE TABLE "Task" (id text PRIMARY KEY, type "TaskType" NOT NULL, size "TaskSize" NOT NULL,
+    priority smallint NOT NULL, "actualTime" double precision, "resourceId" text REFERENCES "Resource"(id),
+    "deletedAt" timestamp);
+INSERT INTO "Resource" VALUES ('r1', 12.5), ('r2', 87.25);
+INSERT INTO "Task"
+SELECT 't' || i, (ARRAY['CPU', 'IO', 'MIXED'])[1 + i % 3]::"TaskType",
+       (ARRAY['SMALL', 'MEDIUM', 'LARGE'])[1 + (i / 3) % 3]::"TaskSize",
+       1 + i % 5, 1.5 + i, CASE WHEN i % 2 = 0 THEN 'r1' ELSE 'r2' END, NULL
+FROM generate_series(0, 29) AS i;
+INSERT INTO "Task" VALUES ('unfinished', 'CPU', 'SMALL', 1, NULL, 'r1', NULL),
+    ('deleted', 'IO', 'LARGE', 2, 3.0, 'r1', now()), ('unassigned', 'MIXED', 'MEDIUM', 3, 4.0, NULL, NULL);
+"""
+
+
+@pytest.mark.skipif(not LIVE_DB_URL, reason="TEST_DATABASE_URL not set (a scratch PostgreSQL database)")
+class TestLivePostgres:
+    @pytest.fixture
+    def database_url(self, monkeypatch):
+        import psycopg2
+        with psycopg2.connect(LIVE_DB_URL) as conn, conn.cursor() as cur:
+            cur.execute(LIVE_SETUP)
+        sep = '&' if '?' in LIVE_DB_URL else '?'
+        monkeypatch.setenv('DATABASE_URL', f"{LIVE_DB_URL}{sep}options=-csearch_path%3D{LIVE_SCHEMA}")
+        yield
+        with psycopg2.connect(LIVE_DB_URL) as conn, conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {LIVE_SCHEMA} CASCADE")
+
+    @pytest.mark.parametrize('use_adbc', [True, False])
+    def test_both_readers_map_enum_codes(self, database_url, monkeypatch, use_adbc):
+        if use_adbc and not train.ADBC_AVAILABLE:
+            pytest.skip('adbc-driver-postgresql not installed')
+        if not use_adbc and not train.POSTGRES_AVAILABLE:
+            pytest.skip('psycopg2 not installed')
+        monkeypatch.setattr(train, 'ADBC_AVAILABLE', use_adbc)
+        df, source = train.load_from_postgres()
+        assert source == ('postgresql-adbc' if use_adbc else 'postgresql-copy')
+        assert {c: str(t) for c, t in df.dtypes.items()} == train.COLUMN_DTYPES
+        df = df.sort_values('actualTime')
+        i = np.rint(df['actualTime'].to_numpy() - 1.5).astype(int)
+        np.testing.assert_array_equal(i, np.arange(30))
+        np.testing.assert_array_equal(df['taskType'], 1 + i % 3)
+        np.testing.assert_array_equal(df['taskSize'], 1 + (i // 3) % 3)
+        np.testing.assert_array_equal(df['priority'], 1 + i % 5)
+        np.testing.assert_array_equal(df['resourceLoad'], np.where(i % 2 == 0, 12.5, 87.25))
+
+
+class TestRegressionMetrics:
+    @pytest.mark.parametrize('offset', [0.0, 1e4, 1e6])
+    def test_matches_sklearn(self, offset):
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        rng = np.random.default_rng(0)
+        y = (offset + rng.normal(0, 1, 5000)).astype(np.float32)
+        y_pred = y + rng.normal(0, 0.3, 5000)
+        mae, rmse, r2 = train._regression_metrics(y, y_pred)
+        y64 = y.astype(np.float64)
+        assert mae == pytest.approx(mean_absolute_error(y64, y_pred), rel=1e-9)
+        assert rmse == pytest.approx(np.sqrt(mean_squared_error(y64, y_pred)), rel=1e-9)
+        assert r2 == pytest.approx(r2_score(y64, y_pred), abs=1e-8)
+
+    def test_constant_targets_follow_sklearn(self):
+        y = np.full(10, 3.0, dtype=np.float32)
+        assert train._regression_metrics(y, y.astype(np.float64))[2] == 1.0
+        assert train._regression_metrics(y, y + 1.0)[2] == 0.0
+
+
+class TestFoldIds:
+    @pytest.mark.parametrize('n, folds', [(1700, 5), (101, 7), (1000, 200), (5000, 300)])
+    def test_balanced_partition(self, n, folds):
+        fold_ids = train._fold_ids(n, folds, seed=42)
+        assert fold_ids.shape == (n,)
+        counts = np.bincount(fold_ids, minlength=folds)
+        assert len(counts) == folds and counts.sum() == n
+        assert counts.max() - counts.min() <= 1
+
+    def test_seeded_and_shuffled(self):
+        a, b = train._fold_ids(500, 5, seed=1), train._fold_ids(500, 5, seed=1)
+        np.testing.assert_array_equal(a, b)
+        assert not np.array_equal(a, np.sort(a))
+
+
+class TestDowncast:
+    def test_keeps_values_and_narrows_dtypes(self):
+        df = pd.DataFrame({
+            'taskSize': [1, 2, 3], 'taskType': [3, 2, 1], 'priority': [1, 5, 3],
+            'resourceLoad': [0.0, 42.125, 100.0], 'actualTime': [0.5, 7.25, 13.0], 'note': ['a', 'b', 'c'],
+        })
+        out = train._downcast(df)
+        assert {c: str(out[c].dtype) for c in train.COLUMN_DTYPES} == train.COLUMN_DTYPES
+        for column in train.COLUMN_DTYPES:
+            np.testing.assert_array_equal(out[column].to_numpy(np.float64), df[column].to_numpy(np.float64))
+        assert out['note'].tolist() == ['a', 'b', 'c']
+
+    def test_keeps_dtype_of_codes_it_cannot_narrow(self, tmp_path):
+        path = tmp_path / 'tasks.csv'
+        path.write_text(
+            "taskSize,taskType,priority,resourceLoad,actualTime\n"
+            "1,2,3,10.5,2.0\n"
+            "2,,200,20.0,4.5\n"
+            "3,1,1,30.0,6.0\n"
+        )
+        loaded = train.load_from_csv(str(path))
+        assert loaded['taskSize'].dtype == np.int8
+        # NaN and values beyond int8 are kept rather than crashing or wrapping around
+        assert loaded['taskType'].isna().sum() == 1
+        assert loaded['priority'].tolist() == [3, 200, 1]
+        assert loaded['priority'].dtype != np.int8
+
+    def test_loaders_return_narrow_frames(self, tmp_path, frame):
+        assert {c: str(t) for c, t in frame.dtypes.items()} == train.COLUMN_DTYPES
+        path = tmp_path / 'tasks.csv'
+        frame.to_csv(path, index=False)
+        loaded = train.load_from_csv(str(path))
+        assert {c: str(t) for c, t in loaded.dtypes.items()} == train.COLUMN_DTYPES
+        np.testing.assert_array_equal(loaded.to_numpy(), frame.to_numpy())
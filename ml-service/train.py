@@ -3,7 +3,7 @@ ML Training Pipeline — train.py
 =================================
 Production training script with:
   • Real data ingestion from PostgreSQL (falls back to synthetic)
-  • k-fold cross-validation (k=5)
+  • k-fold cross-validation (k=5); out-of-bag scoring for RandomForest
   • Train / validation / test split (70/15/15)
   • MAE, RMSE, R² metrics per fold and overall
   • Model versioning with metadata JSON (MLflow-compatible naming)
@@ -17,23 +17,29 @@ Usage:
     python train.py --folds 10 --seed 123   # Custom k-fold / seed
 """
 
+import io
 import os
 import sys
 import json
 import argparse
 import hashlib
-from datetime import datetime
+from contextlib import closing
+from datetime import datetime, timezone
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import joblib
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+import sklearn
+from joblib import Memory, Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import KFold, train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
 from dotenv import load_dotenv
 
+from utils.jit import njit, prange
+
 load_dotenv()
 
 # Optional imports
@@ -49,69 +55,180 @@ try:
 except ImportError:
     POSTGRES_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import cupy
+    CUPY_AVAILABLE = True
+except ImportError:
+    CUPY_AVAILABLE = False
+
+try:
+    import lz4  # noqa: F401  (joblib's lz4 compressor)
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import adbc_driver_postgresql.dbapi as adbc_postgres
+    ADBC_AVAILABLE = True
+except ImportError:
+    ADBC_AVAILABLE = False
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
 MODEL_DIR = Path("models")
 METADATA_DIR = Path("models/metadata")
 FEATURE_NAMES = ["taskSize", "taskType", "priority", "resourceLoad"]
+COLUMN_DTYPES = {"taskSize": "int8", "taskType": "int8", "priority": "int8",
+                 "resourceLoad": "float32", "actualTime": "float32"}
 
 SIZE_MAP = {"SMALL": 1, "MEDIUM": 2, "LARGE": 3}
 TYPE_MAP = {"CPU": 1, "IO": 2, "MIXED": 3}
 
 
+def _values_table(mapping: dict) -> str:
+    return ", ".join(f"('{name}', {code})" for name, code in mapping.items())
+
+
+# Enum codes come from VALUES lookups the planner hash-joins, instead of a CASE per row.
+# Both enums are closed (schema.prisma), so the inner joins drop no rows. A partial index
+# keeps the scan to finished tasks; create it by hand:
+#   CREATE INDEX "Task_completed_resourceId_idx" ON "Task" ("resourceId")
+#   WHERE "actualTime" IS NOT NULL AND "deletedAt" IS NULL;
+TRAINING_QUERY = f"""
+    SELECT
+        s.code AS "taskSize",
+        ty.code AS "taskType",
+        t.priority,
+        r."currentLoad" AS "resourceLoad",
+        t."actualTime"
+    FROM "Task" t
+    JOIN "Resource" r ON t."resourceId" = r.id
+    JOIN (VALUES {_values_table(SIZE_MAP)}) AS s(name, code)
+      ON s.name = t.size::text
+    JOIN (VALUES {_values_table(TYPE_MAP)}) AS ty(name, code)
+      ON ty.name = t.type::text
+    WHERE t."actualTime" IS NOT NULL
+      AND t."deletedAt" IS NULL
+"""
+
+
 def parse_args():
     p = argparse.ArgumentParser(description="Train ML task-time predictor")
-    p.add_argument("--model", choices=["random_forest", "xgboost", "gradient_boosting"],
-                    default="random_forest", help="Model algorithm")
+    p.add_argument("--model", choices=["hist_gradient_boosting", "random_forest", "xgboost", "gradient_boosting"],
+                    default="hist_gradient_boosting", help="Model algorithm")
     p.add_argument("--data", type=str, default=None,
                     help="Path to CSV with columns: taskSize,taskType,priority,resourceLoad,actualTime")
     p.add_argument("--folds", type=int, default=5, help="Number of CV folds")
     p.add_argument("--seed", type=int, default=42, help="Random seed")
+    p.add_argument("--device", choices=["auto", "cpu", "cuda"], default="auto",
+                    help="XGBoost training device (auto: CUDA when a GPU is visible)")
+    p.add_argument("--n-jobs", type=int, default=None,
+                    help="Threads for the final model (default: physical cores)")
+    p.add_argument("--inner-jobs", type=int, default=None,
+                    help="Threads per fold model (default: physical cores / folds)")
     p.add_argument("--test-size", type=float, default=0.15, help="Held-out test fraction")
     p.add_argument("--output", type=str, default=None, help="Custom output model path")
-    return p.parse_args()
+    p.add_argument("--compress", choices=["none", "lz4", "zlib"], default="none",
+                    help="Compress the saved model (smaller file, slower load; lz4 falls back to zlib)")
+    p.add_argument("--cache-dir", type=str, default=None,
+                    help="Reuse fold results from earlier runs on the same data, model and seed")
+    args = p.parse_args()
+    if args.folds < 2:
+        p.error("--folds must be at least 2")
+    return args
 
 
 # ---------------------------------------------------------------------------
 # Data loading
 # ---------------------------------------------------------------------------
-def load_from_postgres() -> pd.DataFrame | None:
-    """Load (task, scheduleHistory) rows that have actualTime from the DB."""
-    if not POSTGRES_AVAILABLE:
-        print("⚠️  psycopg2 not installed — cannot load from PostgreSQL")
-        return None
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrow the model columns to int8 codes and float32 values (no-op when already narrow).
+    A code column with missing, fractional or out-of-range values keeps its original dtype.
+    """
+    dtypes = {}
+    for column, dtype in COLUMN_DTYPES.items():
+        values = df[column]
+        if values.dtype != dtype and np.issubdtype(np.dtype(dtype), np.integer):
+            info = np.iinfo(dtype)
+            if not (values.notna().all() and values.between(info.min, info.max).all()
+                    and (values % 1 == 0).all()):
+                continue
+        dtypes[column] = dtype
+    return df.astype(dtypes, copy=False)
+
+
+def _read_postgres_arrow(db_url: str, query: str) -> pd.DataFrame:
+    import pyarrow as pa  # installed with adbc-driver-postgresql
+
+    schema = pa.schema([(name, pa.from_numpy_dtype(np.dtype(dtype))) for name, dtype in COLUMN_DTYPES.items()])
+    # Binary wire protocol straight into Arrow columns, no per-row Python objects. Batches
+    # are narrowed to int8/float32 as they stream in, so only the compact copy accumulates
+    with adbc_postgres.connect(db_url) as conn, conn.cursor() as cur:
+        cur.execute(query)
+        tables = [pa.Table.from_batches([batch]).select(schema.names).cast(schema)
+                  for batch in cur.fetch_record_batch()]
+    table = pa.concat_tables(tables) if tables else schema.empty_table()
+    return table.to_pandas()
+
+
+def _read_postgres_copy(db_url: str, query: str) -> pd.DataFrame:
+    # COPY streams the result as CSV bytes, skipping per-row Python tuples on the client
+    buf = io.BytesIO()
+    with closing(psycopg2.connect(db_url)) as conn, conn.cursor() as cur:
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT CSV, HEADER)", buf)
+    buf.seek(0)
+    return pd.read_csv(buf, dtype=COLUMN_DTYPES)
+
+
+def load_from_postgres() -> tuple[pd.DataFrame | None, str | None]:
+    """
+    Load (task, scheduleHistory) rows that have actualTime from the DB.
+    Returns (df, source), where source names the reader that produced the rows
+    ("postgresql-adbc" or "postgresql-copy"), or (None, None) when nothing usable was read.
+    """
+    if not (ADBC_AVAILABLE or POSTGRES_AVAILABLE):
+        print("⚠️  Neither adbc-driver-postgresql nor psycopg2 installed — cannot load from PostgreSQL")
+        return None, None
 
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         print("⚠️  DATABASE_URL not set — skipping PostgreSQL")
-        return None
+        return None, None
 
     try:
-        conn = psycopg2.connect(db_url)
-        query = """
-            SELECT
-                CASE t.size WHEN 'SMALL' THEN 1 WHEN 'MEDIUM' THEN 2 ELSE 3 END AS "taskSize",
-                CASE t.type WHEN 'CPU' THEN 1 WHEN 'IO' THEN 2 ELSE 3 END AS "taskType",
-                t.priority,
-                r."currentLoad" AS "resourceLoad",
-                t."actualTime"
-            FROM "Task" t
-            JOIN "Resource" r ON t."resourceId" = r.id
-            WHERE t."actualTime" IS NOT NULL
-              AND t."deletedAt" IS NULL
-        """
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df, source = None, None
+        if ADBC_AVAILABLE:
+            try:
+                df, source = _read_postgres_arrow(db_url, TRAINING_QUERY), "postgresql-adbc"
+            except Exception as e:
+                if not POSTGRES_AVAILABLE:
+                    raise
+                print(f"⚠️  ADBC read failed ({e}) — retrying with psycopg2")
+        if df is None:
+            df, source = _read_postgres_copy(db_url, TRAINING_QUERY), "postgresql-copy"
         if len(df) >= 20:
             print(f"✅ Loaded {len(df)} rows from PostgreSQL")
-            return df
+            return _downcast(df), source
         else:
             print(f"⚠️  Only {len(df)} rows in DB — need at least 20, falling back to synthetic")
-            return None
+            return None, None
     except Exception as e:
         print(f"⚠️  PostgreSQL query failed: {e}")
-        return None
+        return None, None
 
 
 def load_from_csv(path: str) -> pd.DataFrame:
@@ -121,72 +238,195 @@ def load_from_csv(path: str) -> pd.DataFrame:
     if missing:
         raise ValueError(f"CSV missing columns: {missing}")
     print(f"✅ Loaded {len(df)} rows from {path}")
-    return df
+    return _downcast(df)
 
 
 def generate_synthetic(n: int = 2000, seed: int = 42) -> pd.DataFrame:
     """Realistic synthetic data with non-linear interactions."""
-    rng = np.random.RandomState(seed)
-    task_size = rng.choice([1, 2, 3], n)
-    task_type = rng.choice([1, 2, 3], n)
-    priority = rng.choice([1, 2, 3, 4, 5], n)
-    resource_load = rng.uniform(0, 100, n)
-
-    base_time = task_size * 2.0
-    type_mod = np.where(task_type == 1, 1.0, np.where(task_type == 2, 1.3, 1.15))
-    load_mod = 1 + (resource_load / 100) * 0.5
-    pri_mod = 1 - (priority - 3) * 0.02
-    noise = rng.normal(0, 0.5, n)
-    actual_time = np.maximum(base_time * type_mod * load_mod * pri_mod + noise, 0.5)
+    rng = np.random.default_rng(seed)
+    columns = ["taskSize", "taskType", "priority", "resourceLoad", "actualTime"]
+    arr = np.empty((n, len(columns)), dtype=np.float32)
+    task_size = rng.integers(1, 4, n, dtype=np.int8)
+    task_type = rng.integers(1, 4, n, dtype=np.int8)
+    priority = rng.integers(1, 6, n, dtype=np.int8)
+    arr[:, 0] = task_size
+    arr[:, 1] = task_type
+    arr[:, 2] = priority
+    arr[:, 3] = rng.uniform(0, 100, n)
+
+    base_time = np.array([0, 2.0, 4.0, 6.0], dtype=np.float32)[task_size]
+    type_mod = np.array([0, 1.0, 1.3, 1.15], dtype=np.float32)[task_type]
+    load_mod = 1 + (arr[:, 3] / 100) * 0.5
+    pri_mod = 1 - (priority - 3) * np.float32(0.02)
+    noise = rng.normal(0, 0.5, n).astype(np.float32)
+    arr[:, 4] = np.maximum(base_time * type_mod * load_mod * pri_mod + noise, 0.5)
 
     print(f"⚠️  Using synthetic data ({n} samples) — replace with real data for production accuracy")
-    return pd.DataFrame({
-        "taskSize": task_size,
-        "taskType": task_type,
-        "priority": priority,
-        "resourceLoad": resource_load,
-        "actualTime": actual_time,
-    })
+    return _downcast(pd.DataFrame(arr, columns=columns, copy=False))
 
 
 # ---------------------------------------------------------------------------
 # Model factory
 # ---------------------------------------------------------------------------
-def build_model(model_type: str, seed: int):
+def _physical_cores() -> int:
+    # n_jobs=-1 counts hyperthreads; tree split loops are memory-bound, so a second thread
+    # per core only fights its sibling for cache and can make fits slower, not faster
+    if PSUTIL_AVAILABLE:
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def _cuda_available() -> bool:
+    if not CUPY_AVAILABLE:
+        return False
+    try:
+        return cupy.cuda.runtime.getDeviceCount() > 0
+    except Exception:
+        return False
+
+
+def resolve_device(device: str) -> str:
+    if device == "auto":
+        return "cuda" if _cuda_available() else "cpu"
+    return device
+
+
+def build_model(model_type: str, seed: int, n_jobs: int | None = None, device: str = "cpu"):
+    if n_jobs is None:
+        n_jobs = _physical_cores()
     if model_type == "xgboost":
         if not XGBOOST_AVAILABLE:
             raise RuntimeError("xgboost not installed")
+        # Histogram building runs as CUDA kernels on device="cuda"; NumPy input is copied over
         return xgb.XGBRegressor(
             n_estimators=200, max_depth=6, learning_rate=0.08,
             min_child_weight=2, subsample=0.8, colsample_bytree=0.8,
-            random_state=seed, n_jobs=-1,
+            tree_method="hist", device=device, random_state=seed, n_jobs=n_jobs,
         )
     elif model_type == "gradient_boosting":
         return GradientBoostingRegressor(
             n_estimators=200, max_depth=6, learning_rate=0.08,
             min_samples_split=5, min_samples_leaf=2, random_state=seed,
         )
+    elif model_type == "hist_gradient_boosting":
+        # Bins each feature into at most 256 uint8 buckets once, then splits on histograms
+        return HistGradientBoostingRegressor(
+            max_iter=300, max_depth=8, learning_rate=0.08,
+            early_stopping=True, random_state=seed,
+        )
     else:
         return RandomForestRegressor(
             n_estimators=200, max_depth=12, min_samples_split=5,
-            min_samples_leaf=2, random_state=seed, n_jobs=-1,
+            min_samples_leaf=2, bootstrap=True, oob_score=True,
+            random_state=seed, n_jobs=n_jobs,
         )
 
 
 # ---------------------------------------------------------------------------
 # Training
 # ---------------------------------------------------------------------------
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Order-independent SHA-256 of the model columns, hashed from their raw int8/float32
+    buffers. Other columns (e.g. extra CSV fields) are ignored: object columns would hash
+    PyObject pointers and can't be lexsorted.
+    """
+    columns = sorted(COLUMN_DTYPES)
+    model_df = _downcast(df[columns])
+    values = [model_df[c].to_numpy() for c in columns]
+    # lexsort's last key is the primary one; sort by the first column first
+    order = np.lexsort(values[::-1])
+    h = hashlib.sha256()
+    for name, col in zip(columns, values):
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(col[order]).tobytes())
+    return h.hexdigest()[:12]
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _regression_metrics(y, y_pred):
+    """MAE, RMSE and R² from one fused pass over the targets and predictions."""
+    n = y.shape[0]
+    # Sum y around a shift of y[0]: the one-pass variance sum(y²) - sum(y)²/n otherwise
+    # cancels catastrophically when the targets sit far from zero
+    shift = float(y[0])
+    sum_abs = 0.0
+    sum_sq = 0.0
+    sum_y = 0.0
+    sum_y2 = 0.0
+    for i in prange(n):
+        yi = float(y[i])
+        err = yi - float(y_pred[i])
+        sum_abs += abs(err)
+        sum_sq += err * err
+        d = yi - shift
+        sum_y += d
+        sum_y2 += d * d
+    ss_tot = sum_y2 - sum_y * sum_y / n
+    if ss_tot > 0:
+        r2 = 1.0 - sum_sq / ss_tot
+    else:
+        # Constant targets: sklearn's r2_score convention
+        r2 = 1.0 if sum_sq == 0 else 0.0
+    return sum_abs / n, np.sqrt(sum_sq / n), r2
+
+
+def _fold_ids(n: int, folds: int, seed: int) -> np.ndarray:
+    """Assign each of n rows to one of `folds` near-equal folds with a single shuffle."""
+    # Smallest unsigned type that holds every fold number (uint8 up to 256 folds)
+    fold_ids = np.empty(n, dtype=np.min_scalar_type(folds - 1))
+    fold_ids[np.random.default_rng(seed).permutation(n)] = np.arange(n) * folds // n
+    return fold_ids
+
+
+def _library_versions() -> dict:
+    versions = {"numpy": np.__version__, "sklearn": sklearn.__version__}
+    if XGBOOST_AVAILABLE:
+        versions["xgboost"] = xgb.__version__
+    return versions
+
+
+def _fit_fold(fold, X, y, fold_ids, model_type, model_params, versions, n_jobs):
+    """
+    Scale, fit and score cross-validation fold `fold` (1-based) of X/y.
+
+    model_params is the full estimator configuration (without n_jobs) and versions the
+    installed ML libraries; neither changes the computation beyond set_params, but both
+    are part of the --cache-dir key, so edited hyperparameters or an upgraded library
+    never serve stale fold metrics.
+    """
+    # Boolean masks copy rows front to back instead of gathering from shuffled indices
+    val_mask = fold_ids == fold - 1
+    train_mask = ~val_mask
+    X_tr, X_val = X[train_mask], X[val_mask]
+    y_tr, y_val = y[train_mask], y[val_mask]
+
+    fold_scaler = StandardScaler()
+    X_tr_scaled = fold_scaler.fit_transform(X_tr)
+    X_val_scaled = fold_scaler.transform(X_val)
+
+    model = build_model(model_type, model_params.get("random_state", 0), n_jobs).set_params(**model_params)
+    model.fit(X_tr_scaled, y_tr)
+    y_pred = model.predict(X_val_scaled)
+
+    mae, rmse, r2 = _regression_metrics(y_val, y_pred)
+    return {"fold": fold, "mae": mae, "rmse": rmse, "r2": r2}
+
+
 def train(args):
     # 1. Load data
     if args.data:
-        df = load_from_csv(args.data)
+        df, data_source = load_from_csv(args.data), args.data
     else:
-        df = load_from_postgres()
+        df, data_source = load_from_postgres()
         if df is None:
-            df = generate_synthetic(seed=args.seed)
+            df, data_source = generate_synthetic(seed=args.seed), "synthetic"
 
-    X = df[FEATURE_NAMES].values
-    y = df["actualTime"].values
+    # Trees split on float32 internally; handing them float32 up front skips sklearn's copy
+    X = np.ascontiguousarray(df[FEATURE_NAMES].to_numpy(dtype=np.float32))
+    y = df["actualTime"].to_numpy(dtype=np.float32)
 
     # 2. Hold-out test split
     X_dev, X_test, y_dev, y_test = train_test_split(
@@ -194,44 +434,57 @@ def train(args):
     )
     print(f"\n📊 Data split: {len(X_dev)} dev / {len(X_test)} test")
 
-    # 3. k-fold cross-validation on dev set
-    kf = KFold(n_splits=args.folds, shuffle=True, random_state=args.seed)
+    # 3. k-fold cross-validation on dev set. A bagged forest skips it: its out-of-bag
+    # predictions score every dev row with trees that never saw it, at no extra fit
+    use_oob = args.model == "random_forest"
+    device = resolve_device(args.device) if args.model == "xgboost" else "cpu"
+    if device == "cuda":
+        print("🚀 Training XGBoost on CUDA")
     fold_metrics = []
-
-    for fold, (train_idx, val_idx) in enumerate(kf.split(X_dev), 1):
-        X_tr, X_val = X_dev[train_idx], X_dev[val_idx]
-        y_tr, y_val = y_dev[train_idx], y_dev[val_idx]
-
-        fold_scaler = StandardScaler()
-        X_tr_scaled = fold_scaler.fit_transform(X_tr)
-        X_val_scaled = fold_scaler.transform(X_val)
-
-        model = build_model(args.model, args.seed)
-        model.fit(X_tr_scaled, y_tr)
-        y_pred = model.predict(X_val_scaled)
-
-        mae = mean_absolute_error(y_val, y_pred)
-        rmse = float(np.sqrt(mean_squared_error(y_val, y_pred)))
-        r2 = r2_score(y_val, y_pred)
-        fold_metrics.append({"fold": fold, "mae": mae, "rmse": rmse, "r2": r2})
-        print(f"  Fold {fold}/{args.folds}: MAE={mae:.4f}  RMSE={rmse:.4f}  R²={r2:.4f}")
-
-    avg = {
-        "mae": float(np.mean([m["mae"] for m in fold_metrics])),
-        "rmse": float(np.mean([m["rmse"] for m in fold_metrics])),
-        "r2": float(np.mean([m["r2"] for m in fold_metrics])),
-    }
-    print(f"\n📈 CV Average: MAE={avg['mae']:.4f}  RMSE={avg['rmse']:.4f}  R²={avg['r2']:.4f}")
+    if not use_oob:
+        fold_ids = _fold_ids(len(X_dev), args.folds, args.seed)
+
+        # Fit the folds side by side, splitting the cores between them instead of giving
+        # every fold's model all of them in turn. Workers get X_dev plus the fold ids and
+        # select their own rows (joblib memory-maps large arrays rather than copying them)
+        cpus = _physical_cores()
+        inner_jobs = args.inner_jobs or max(1, cpus // args.folds)
+        # Memory(None) caches nothing; thread counts do not change a fold's result
+        fit_fold = Memory(args.cache_dir, verbose=0).cache(_fit_fold, ignore=["n_jobs"])
+        model_params = build_model(args.model, args.seed, device=device).get_params()
+        model_params.pop("n_jobs", None)
+        versions = _library_versions()
+        fold_metrics = Parallel(n_jobs=min(args.folds, cpus), backend="loky")(
+            delayed(fit_fold)(fold, X_dev, y_dev, fold_ids, args.model, model_params, versions, inner_jobs)
+            for fold in range(1, args.folds + 1)
+        )
+        for m in fold_metrics:
+            print(f"  Fold {m['fold']}/{args.folds}: MAE={m['mae']:.4f}  RMSE={m['rmse']:.4f}  R²={m['r2']:.4f}")
 
     # 4. Final model trained on full dev set with StandardScaler & Conformal calibration
     scaler = StandardScaler()
     X_dev_scaled = scaler.fit_transform(X_dev)
     X_test_scaled = scaler.transform(X_test)
 
-    final_model = build_model(args.model, args.seed)
+    final_model = build_model(args.model, args.seed, args.n_jobs, device)
     final_model.fit(X_dev_scaled, y_dev)
+    if device != "cpu":
+        # The service predicts on CPU workers; don't ship a model that asks for a GPU
+        final_model.set_params(device="cpu")
     y_test_pred = final_model.predict(X_test_scaled)
 
+    if use_oob:
+        oob_mae, oob_rmse, oob_r2 = _regression_metrics(y_dev, final_model.oob_prediction_)
+        avg = {"mae": oob_mae, "rmse": oob_rmse, "r2": oob_r2}
+        print(f"\n📈 Out-of-bag: MAE={avg['mae']:.4f}  RMSE={avg['rmse']:.4f}  R²={avg['r2']:.4f}")
+    else:
+        avg = {
+            "mae": np.mean([m["mae"] for m in fold_metrics]),
+            "rmse": np.mean([m["rmse"] for m in fold_metrics]),
+            "r2": np.mean([m["r2"] for m in fold_metrics]),
+        }
+        print(f"\n📈 CV Average: MAE={avg['mae']:.4f}  RMSE={avg['rmse']:.4f}  R²={avg['r2']:.4f}")
+
     # Conformal calibration on dev set
     dev_preds = final_model.predict(X_dev_scaled)
     dev_residuals = np.abs(y_dev - dev_preds)
@@ -240,50 +493,70 @@ def train(args):
     q_level = min(1.0, np.ceil((n_dev + 1) * (1 - alpha)) / n_dev)
     calibration_quantile = float(np.quantile(dev_residuals, q_level))
 
+    test_mae, test_rmse, test_r2 = _regression_metrics(y_test, y_test_pred)
     test_metrics = {
-        "mae": float(mean_absolute_error(y_test, y_test_pred)),
-        "rmse": float(np.sqrt(mean_squared_error(y_test, y_test_pred))),
-        "r2": float(r2_score(y_test, y_test_pred)),
+        "mae": test_mae,
+        "rmse": test_rmse,
+        "r2": test_r2,
         "conformal_quantile_95": round(calibration_quantile, 4),
     }
     print(f"\n🧪 Test set: MAE={test_metrics['mae']:.4f}  RMSE={test_metrics['rmse']:.4f}  R²={test_metrics['r2']:.4f}  Conformal95={calibration_quantile:.4f}s")
 
     # 5. Feature importance
-    importance = {}
     if hasattr(final_model, "feature_importances_"):
-        for name, imp in zip(FEATURE_NAMES, final_model.feature_importances_):
-            importance[name] = round(float(imp), 4)
-        print(f"\n🔍 Feature Importance: {importance}")
+        importances = final_model.feature_importances_
+    else:
+        # HistGradientBoosting has no impurity importances; score shuffled test columns instead
+        importances = permutation_importance(
+            final_model, X_test_scaled, y_test, n_repeats=5, random_state=args.seed,
+        ).importances_mean
+        # Report shares like the impurity importances do: non-negative and summing to 1
+        importances = np.clip(importances, 0, None)
+        if importances.sum() > 0:
+            importances = importances / importances.sum()
+    importance = {name: round(float(imp), 4) for name, imp in zip(FEATURE_NAMES, importances)}
+    print(f"\n🔍 Feature Importance: {importance}")
 
     # 6. Save model + scaler + metadata
-    version = f"v{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    # One UTC timestamp for both the version and trained_at; the pid keeps two runs
+    # started in the same second from writing the same metadata file
+    now = datetime.now(timezone.utc)
+    version = f"v{now:%Y%m%d%H%M%S}_{os.getpid()}"
     model_path = Path(args.output) if args.output else MODEL_DIR / "task_predictor.joblib"
     MODEL_DIR.mkdir(parents=True, exist_ok=True)
     METADATA_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Uncompressed by default: the service hot-reloads this file in every worker, and
+    # decompressing costs more load time than reading the larger file
+    compress = 0
+    if args.compress != "none":
+        compress = ("lz4" if args.compress == "lz4" and LZ4_AVAILABLE else "zlib", 3)
+    # Write aside and rename so a running service never loads a partial file
+    tmp_model_path = model_path.with_name(model_path.name + ".tmp")
     joblib.dump({
         "model": final_model,
         "scaler": scaler,
         "calibration_quantile": calibration_quantile,
         "version": version,
         "model_type": args.model,
-    }, model_path)
+    }, tmp_model_path, compress=compress)
+    os.replace(tmp_model_path, model_path)
 
-    # Data fingerprint (hash of sorted unique rows) for reproducibility
-    data_hash = hashlib.sha256(
-        df.sort_values(list(df.columns)).to_csv(index=False).encode()
-    ).hexdigest()[:12]
+    # Data fingerprint (hash of sorted rows) for reproducibility
+    data_hash = data_fingerprint(df)
 
     metadata = {
         "version": version,
         "model_type": args.model,
-        "trained_at": datetime.utcnow().isoformat() + "Z",
-        "data_source": args.data or ("postgresql" if POSTGRES_AVAILABLE else "synthetic"),
+        "trained_at": now.isoformat().replace("+00:00", "Z"),
+        "data_source": data_source,
         "data_hash": data_hash,
         "data_rows": len(df),
         "dev_rows": len(X_dev),
         "test_rows": len(X_test),
-        "k_folds": args.folds,
+        "device": device,
+        "cv_method": "oob" if use_oob else "kfold",
+        "k_folds": 0 if use_oob else args.folds,
         "seed": args.seed,
         "cv_metrics": avg,
         "test_metrics": test_metrics,
@@ -293,8 +566,12 @@ def train(args):
     }
 
     meta_path = METADATA_DIR / f"{version}.json"
-    with open(meta_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+    tmp_path = meta_path.with_suffix(".json.tmp")
+    if ORJSON_AVAILABLE:
+        tmp_path.write_bytes(orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        tmp_path.write_text(json.dumps(metadata, indent=2, default=float))
+    os.replace(tmp_path, meta_path)
 
     print(f"\n💾 Model saved: {model_path}")
     print(f"📋 Metadata saved: {meta_path}")
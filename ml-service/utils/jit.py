@@ -0,0 +1,17 @@
+"""
+Optional Numba JIT. Without numba, njit leaves functions as plain Python/NumPy
+and prange is range, so decorated kernels still run (just slower).
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Supports both @njit and @njit(signature, cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -0,0 +1,50 @@
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, used for request.get_json() and jsonify().
+    Keeps Flask's defaults (sorted keys, RFC 822 datetimes via default()) and
+    serializes NumPy arrays/scalars natively.
+    """
+
+    def _options(self, indent=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def read_json(silent=False):
+    """
+    Parse the request body once with the app's JSON provider (orjson when installed).
+    Skips request.get_json()'s mimetype check and does not keep a cached copy of the raw body.
+    """
+    try:
+        return current_app.json.loads(request.get_data(cache=False))
+    except ValueError:
+        if silent:
+            return None
+        raise BadRequest('Request body is not valid JSON')
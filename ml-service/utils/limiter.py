@@ -6,8 +6,17 @@ redis_url = os.getenv("REDIS_URL", "")
 if not redis_url or os.getenv("TESTING", "").lower() == "true" or os.getenv("FLASK_ENV") == "testing":
     redis_url = "memory://"
 
+# With Redis, all gunicorn workers (and replicas) share one fixed-window counter per client
+# (atomic INCR + EXPIRE); memory:// is per-process, so the effective limit scales with workers.
+storage_options = {}
+if redis_url.startswith("redis"):
+    # Fail fast so a slow Redis cannot stall requests; fall back to per-process counters meanwhile
+    storage_options = {"socket_timeout": 0.05, "socket_connect_timeout": 0.5}
+
 limiter = Limiter(
     key_func=get_remote_address,
     storage_uri=redis_url,
-    strategy="fixed-window"
+    storage_options=storage_options,
+    strategy="fixed-window",
+    in_memory_fallback_enabled=redis_url != "memory://",
 )
@@ -1,7 +1,8 @@
 import os
 import logging
+import threading
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,14 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated
 
-# Simple metrics dictionary
+# Try to import prometheus_client (optional) - atomic counters/histograms and exposition format
+try:
+    from prometheus_client import Counter, Histogram
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+# Simple metrics dictionary (used when prometheus_client is not installed)
 _metrics = {
     'predict_requests_total': 0,
     'predict_latency_sum': 0.0,
@@ -36,10 +44,56 @@ _metrics = {
     'batch_requests_total': 0,
     'errors_total': 0,
     'batch_tasks_total': 0,
+    'dataset_uploads_total': 0,
 }
 
+LATENCY_BUCKETS = (.001, .005, .01, .05, .1, .5, 1, 5, 30, 120)
+
+_counters = {}
+_histograms = {}
+_metrics_lock = threading.Lock()
+if PROMETHEUS_AVAILABLE:
+    for _name in _metrics:
+        if _name.endswith('_total'):
+            _counters[_name] = Counter(f'ml_{_name.removesuffix("_total")}', f'ML service metric: {_name}')
+    for _name in ('predict', 'train'):
+        _histograms[_name] = Histogram(f'ml_{_name}_latency_seconds', f'ML service {_name} latency',
+                                       buckets=LATENCY_BUCKETS)
+
 def record_metric(name: str, value: float = 1.0):
-    _metrics[name] = _metrics.get(name, 0.0) + value
+    if not PROMETHEUS_AVAILABLE:
+        _metrics[name] = _metrics.get(name, 0.0) + value
+        return
+    counter = _counters.get(name)
+    if counter is None:
+        with _metrics_lock:
+            if name not in _counters:
+                _counters[name] = Counter(f'ml_{name.removesuffix("_total")}', f'ML service metric: {name}')
+            counter = _counters[name]
+    counter.inc(value)
+
+def observe_latency(name: str, seconds: float):
+    """Record a request latency for 'predict' or 'train'."""
+    if PROMETHEUS_AVAILABLE:
+        _histograms[name].observe(seconds)
+    else:
+        record_metric(f'{name}_latency_sum', seconds)
+        record_metric(f'{name}_latency_count')
+
+# Serialized bodies for responses that only change when the model does
+_response_cache = {}
+
+def cached_json_response(name: str, key: tuple, build, status: int = 200):
+    """
+    Return a JSON response whose body is serialized once per distinct key.
+    key must capture everything build() depends on (e.g. model version and type),
+    so a train/retrain/switch/hot-reload naturally invalidates the entry.
+    """
+    entry = _response_cache.get(name)
+    if entry is None or entry[0] != key:
+        entry = (key, current_app.json.dumps(build()).encode() + b"\n")
+        _response_cache[name] = entry
+    return current_app.response_class(entry[1], status=status, mimetype='application/json')
 
 # OpenTelemetry tracer
 _tracer = None
@@ -0,0 +1,116 @@
+import numpy as np
+from utils.jit import njit
+
+TASK_FIELDS = ['taskSize', 'taskType', 'priority', 'resourceLoad']
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+@njit(cache=True)
+def _valid_rows(size, task_type, priority, load, overhead):
+    """Combined range check; Numba fuses the element-wise expression into one loop."""
+    return (
+        ((size == 1) | (size == 2) | (size == 3))
+        & ((task_type == 1) | (task_type == 2) | (task_type == 3))
+        & (priority >= 1) & (priority <= 5)
+        & (load >= 0) & (load <= 100)
+        & np.isfinite(overhead)
+    )
+
+
+def validate_tasks(tasks):
+    """
+    Validate prediction payloads column-wise with NumPy range masks instead of
+    per-task int()/float() casts and comparisons.
+    Returns:
+        (X, valid, errors) where X is a float32 matrix of shape (n, 5) holding
+        [taskSize, taskType, priority, resourceLoad, startupOverhead], valid is
+        a boolean row mask and errors is a list of {'index', 'error'} dicts
+    """
+    raw = [
+        [t.get('taskSize'), t.get('taskType'), t.get('priority'), t.get('resourceLoad'),
+         t.get('startupOverhead', 1.0)] if isinstance(t, dict) else [None] * 5
+        for t in tasks
+    ]
+    try:
+        X = np.asarray(raw, dtype=np.float32).reshape(-1, 5)
+    except (TypeError, ValueError):
+        # Some value is not numeric; fall back to a per-value cast (bad values become NaN)
+        X = np.array([[_to_float(v) for v in row] for row in raw], dtype=np.float32).reshape(-1, 5)
+
+    # Integer fields follow int() semantics
+    X[:, :3] = np.trunc(X[:, :3])
+
+    valid = _valid_rows(X[:, 0], X[:, 1], X[:, 2], X[:, 3], X[:, 4])
+    errors = []
+    if valid.all():
+        return X, valid, errors
+
+    # Per-column masks are only needed to explain rejected rows.
+    # NaN compares False, so missing/non-numeric values fail their range check
+    checks = [
+        (np.isin(X[:, 0], (1, 2, 3)), 'taskSize must be 1, 2, or 3'),
+        (np.isin(X[:, 1], (1, 2, 3)), 'taskType must be 1, 2, or 3'),
+        ((X[:, 2] >= 1) & (X[:, 2] <= 5), 'priority must be between 1 and 5'),
+        ((X[:, 3] >= 0) & (X[:, 3] <= 100), 'resourceLoad must be between 0 and 100'),
+        (np.isfinite(X[:, 4]), 'startupOverhead must be a number'),
+    ]
+    for idx in np.flatnonzero(~valid).tolist():
+        task = tasks[idx]
+        if not isinstance(task, dict):
+            error = 'Task must be a JSON object'
+        else:
+            missing = [f for f in TASK_FIELDS if f not in task]
+            if missing:
+                error = f'Missing fields: {missing}'
+            else:
+                error = next(message for ok, message in checks if not ok[idx])
+        errors.append({'index': idx, 'error': error})
+
+    return X, valid, errors
+
+
+def training_arrays(data):
+    """
+    Build float32 (X, y) arrays from a training payload in a single pass.
+    Accepts row format {'data': [{taskSize, ..., actualTime}, ...]} or column
+    format {'X': [[taskSize, taskType, priority, resourceLoad(, startupOverhead)], ...],
+    'y': [actualTime, ...]}, which is converted with np.asarray directly.
+    """
+    if 'X' in data and 'y' in data:
+        X = np.asarray(data['X'], dtype=np.float32)
+        y = np.asarray(data['y'], dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] not in (4, 5) or y.shape != (len(X),):
+            raise ValueError('X must be an (n, 4) or (n, 5) matrix and y a list of n times')
+        if X.shape[1] == 4:
+            X = np.hstack([X, np.ones((len(X), 1), dtype=np.float32)])
+        return X, y
+
+    rows = data.get('data') or []
+    X = np.empty((len(rows), 5), dtype=np.float32)
+    y = np.empty(len(rows), dtype=np.float32)
+    for i, item in enumerate(rows):
+        X[i] = (item['taskSize'], item['taskType'], item['priority'], item['resourceLoad'],
+                item.get('startupOverhead', 1.0))
+        y[i] = item['actualTime']
+    return X, y
+
+
+def parse_task(data):
+    """
+    Validate a single task payload with the same rules as validate_tasks.
+    Returns:
+        (features, error) where features is [taskSize, taskType, priority,
+        resourceLoad, startupOverhead] with the first three as int, or
+        (None, message) if the payload is invalid
+    """
+    X, _valid, errors = validate_tasks([data])
+    if errors:
+        return None, errors[0]['error']
+    task_size, task_type, priority, resource_load, startup_overhead = X[0].tolist()
+    return [int(task_size), int(task_type), int(priority), resource_load, startup_overhead], None